@@ -0,0 +1,138 @@
+import argparse
+import json
+import os
+import pickle
+import shutil
+import tempfile
+import time
+from dataclasses import dataclass
+
+from dashboard_model import SCATTER_FEATURES, load_model
+from data_store import DATA_PATH, load_sections
+from disk_cache import dumps
+from figures import BUILDERS, THEME, compact_json
+from schema import validate
+
+ARTIFACTS_ENV = 'DASHBOARD_ARTIFACTS'
+# Bump when the bundle layout or the pickled model changes shape
+BUNDLE_FORMAT = 7
+CURRENT = 'CURRENT'
+MANIFEST = 'manifest.json'
+MODEL = 'model.pkl'
+
+
+@dataclass(frozen=True)
+class Bundle:
+    path: str
+    manifest: dict
+    model: object
+    # ((name, params, spec), ...) for every panel rendered ahead of time
+    figures: tuple
+
+
+def artifact_root():
+    # Artifact mode is on when DASHBOARD_ARTIFACTS points at a precomputed root
+    return os.environ.get(ARTIFACTS_ENV) or None
+
+
+def default_panels(model):
+    # Every (chart, params) the page renders before any widget is touched
+    panels = [(name, {}) for name in BUILDERS if name != 'scatter']
+    panels += [('scatter', {'feature': feature}) for feature in SCATTER_FEATURES]
+    if model.history.is_multi_year():
+        panels += [('trend', {'year': year}) for year in model.history.years]
+    return panels
+
+
+def _panel_file(name, params):
+    return '-'.join([name] + [str(v) for _, v in sorted(params.items())]).replace(' ', '_') + '.json'
+
+
+def bundle_name(model):
+    return f'v{BUNDLE_FORMAT}-{model.data_hash[:16]}'
+
+
+def write_bundle(model, root):
+    # Builds into a temp dir next to the target and swaps it in, then moves the
+    # CURRENT pointer, so a running app never sees a half-written bundle
+    os.makedirs(root, exist_ok=True)
+    name = bundle_name(model)
+    tmp = tempfile.mkdtemp(dir=root, prefix='.tmp-')
+    try:
+        os.makedirs(os.path.join(tmp, 'figures'))
+        panels = []
+        for chart, params in default_panels(model):
+            filename = _panel_file(chart, params)
+            with open(os.path.join(tmp, 'figures', filename), 'w', encoding='utf-8') as f:
+                f.write(compact_json(BUILDERS[chart](model, **params)))
+            panels.append({'name': chart, 'params': params, 'file': filename})
+
+        with open(os.path.join(tmp, MODEL), 'wb') as f:
+            f.write(dumps(model))
+
+        manifest = {
+            'format': BUNDLE_FORMAT,
+            'data_hash': model.data_hash,
+            'versions': dict(model.versions),
+            'theme': THEME,
+            'created': time.time(),
+            'panels': panels,
+        }
+        with open(os.path.join(tmp, MANIFEST), 'w', encoding='utf-8') as f:
+            json.dump(manifest, f, indent=2)
+
+        target = os.path.join(root, name)
+        if os.path.exists(target):
+            shutil.rmtree(target)
+        os.replace(tmp, target)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+
+    pointer = os.path.join(root, CURRENT + '.tmp')
+    with open(pointer, 'w', encoding='utf-8') as f:
+        f.write(name)
+    os.replace(pointer, os.path.join(root, CURRENT))
+    return target
+
+
+def current_bundle(root):
+    with open(os.path.join(root, CURRENT), encoding='utf-8') as f:
+        return os.path.join(root, f.read().strip())
+
+
+def load_bundle(path):
+    with open(os.path.join(path, MANIFEST), encoding='utf-8') as f:
+        manifest = json.load(f)
+    if manifest['format'] != BUNDLE_FORMAT:
+        raise ValueError(f"{path} has bundle format {manifest['format']}, expected {BUNDLE_FORMAT}; "
+                         f'rerun python artifacts.py')
+
+    with open(os.path.join(path, MODEL), 'rb') as f:
+        model = pickle.load(f)
+
+    figures = []
+    # Specs built under another theme would be stale; let the app rebuild them
+    if manifest['theme'] == THEME:
+        for panel in manifest['panels']:
+            with open(os.path.join(path, 'figures', panel['file']), encoding='utf-8') as f:
+                figures.append((panel['name'], panel['params'], f.read()))
+    return Bundle(path=path, manifest=manifest, model=model, figures=tuple(figures))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute every dashboard artifact for artifact mode.')
+    parser.add_argument('path', nargs='?', default=DATA_PATH, help='source JSON file')
+    parser.add_argument('--out', default='artifacts', help='artifact root (DASHBOARD_ARTIFACTS for the app)')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    problems = validate(load_sections(args.path))
+    if problems:
+        parser.error(f'{args.path} does not match the dashboard schema:\n  ' + '\n  '.join(problems))
+    target = write_bundle(load_model(args.path), args.out)
+    print(f'wrote {target} in {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
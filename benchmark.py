@@ -0,0 +1,161 @@
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from data_store import CODE_DIR, read_raw
+
+APP_PATH = os.path.join(CODE_DIR, 'stream.py')
+SIZES = (38, 500, 5000, 50000)
+
+# Columns that are bounded percentages in the survey data
+PERCENT_COLUMNS = ['Tingkat Kegemaran Membaca', 'APS_7_12', 'APS_13_15', 'APS_16_18', 'APS_19_23']
+ORDINAL_COLUMNS = ['Frekuensi Membaca', 'Durasi Membaca1', 'Jumlah Buku yang Dibaca',
+                   'Frekuensi Akses Internet', 'Durasi Akses Internet1']
+
+
+def synthetic_data(n_rows, seed=0):
+    # Bootstrap the real provinces and jitter the continuous columns, so the
+    # distributions, category mix and region names stay realistic at any size
+    base = read_raw()
+    provinces = pd.DataFrame(base['provinces'])
+    rng = np.random.default_rng(seed)
+
+    rows = provinces.iloc[np.arange(n_rows) % len(provinces)].reset_index(drop=True)
+    if n_rows > len(provinces):
+        extra = slice(len(provinces), None)
+        noise = rng.normal(scale=rows[PERCENT_COLUMNS].std().to_numpy() * 0.25,
+                           size=(n_rows - len(provinces), len(PERCENT_COLUMNS)))
+        rows.loc[extra, PERCENT_COLUMNS] = np.clip(rows.loc[extra, PERCENT_COLUMNS].to_numpy() + noise, 0, 100)
+        for col in ORDINAL_COLUMNS:
+            rows.loc[extra, col] = rng.choice(provinces[col].to_numpy(), size=n_rows - len(provinces))
+    rows[PERCENT_COLUMNS] = rows[PERCENT_COLUMNS].round(2)
+
+    tgm = rows['Tingkat Kegemaran Membaca']
+    labels = rows['Label_TGM'].map({0: 'Rendah', 1: 'Sedang', 2: 'Tinggi'})
+    return {
+        'provinces': rows.to_dict(orient='records'),
+        'statistics': {
+            'total_provinces': n_rows,
+            'avg_tgm': float(tgm.mean()),
+            'min_tgm': float(tgm.min()),
+            'max_tgm': float(tgm.max()),
+            'class_distribution': labels.value_counts().to_dict(),
+        },
+        'pca_data': base['pca_data'],
+        'knn_evaluation': base['knn_evaluation'],
+    }
+
+
+def run_app(warm_runs):
+    # Runs inside a fresh interpreter (with DASHBOARD_DATA pointing at the
+    # synthetic file) so every dataset pays a real cold start
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_PATH, default_timeout=600)
+
+    start = time.perf_counter()
+    at.run()
+    cold = time.perf_counter() - start
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+
+    # Then open every lazy section, as a user scrolling through the page would.
+    # AppTest does not echo expander state back like a browser, so it is set
+    # again before every run.
+    sections = [section.key for section in at.expander if section.key]
+
+    def open_sections():
+        for key in sections:
+            at.session_state[key] = True
+
+    open_sections()
+    start = time.perf_counter()
+    at.run()
+    expand = time.perf_counter() - start
+
+    warm = []
+    for _ in range(warm_runs):
+        open_sections()
+        start = time.perf_counter()
+        at.run()
+        warm.append(time.perf_counter() - start)
+
+    payloads = {}
+    for chart in at.get('plotly_chart'):
+        name = chart.proto.id.split('-', 2)[-1]
+        payloads[name] = len(chart.proto.spec.encode())
+
+    return {
+        'cold_s': cold,
+        'expand_s': expand,
+        'warm_s': statistics.median(warm),
+        'max_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+        'payload_bytes': payloads,
+    }
+
+
+def benchmark(sizes=SIZES, warm_runs=5):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for n_rows in sizes:
+            data_path = os.path.join(tmp, f'dashboard_{n_rows}.json')
+            with open(data_path, 'w', encoding='utf-8') as f:
+                json.dump(synthetic_data(n_rows), f)
+
+            proc = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', '--warm-runs', str(warm_runs)],
+                env=dict(os.environ, DASHBOARD_DATA=data_path),
+                capture_output=True, text=True, check=True
+            )
+            result = json.loads(proc.stdout.strip().splitlines()[-1])
+            result['rows'] = n_rows
+            results.append(result)
+    return results
+
+
+def print_report(results):
+    summary = pd.DataFrame([{
+        'rows': r['rows'],
+        'cold_s': r['cold_s'],
+        'expand_s': r['expand_s'],
+        'warm_ms': r['warm_s'] * 1000,
+        'max_rss_mb': r['max_rss_mb'],
+        'payload_kb': sum(r['payload_bytes'].values()) / 1024,
+    } for r in results]).set_index('rows')
+    print(summary.round(2).to_string())
+
+    payloads = pd.DataFrame({r['rows']: r['payload_bytes'] for r in results}) / 1024
+    print('\nPayload per chart (KB)')
+    print(payloads.round(1).to_string())
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Headless benchmark of stream.py on synthetic data.')
+    parser.add_argument('--sizes', type=int, nargs='+', default=list(SIZES), help='row counts to benchmark')
+    parser.add_argument('--warm-runs', type=int, default=5, help='reruns timed per dataset')
+    parser.add_argument('--json', help='also write the raw results to this file')
+    parser.add_argument('--worker', action='store_true', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(run_app(args.warm_runs)))
+        return
+
+    results = benchmark(args.sizes, args.warm_runs)
+    print_report(results)
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,285 @@
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+
+import numpy as np
+import pandas as pd
+
+from data_store import DATA_PATH, SECTIONS, DataWatcher, load_sections
+from importance import permutation_importance
+from knn_engine import LABEL_MAP, evaluate as evaluate_knn
+from neighbors import build_index
+from pca import project as project_pca
+from timeseries import build_store
+from whatif import build_scorer
+
+TGM_COL = 'Tingkat Kegemaran Membaca'
+CATEGORY_ORDER = ['Tinggi', 'Sedang', 'Rendah']
+
+REGIONS = {
+    'Jawa': ['DKI Jakarta', 'Jawa Barat', 'Jawa Tengah', 'DI Yogyakarta', 'Jawa Timur', 'Banten'],
+    'Sumatera': ['Aceh', 'Sumatera Utara', 'Sumatera Barat', 'Riau', 'Jambi', 'Sumatera Selatan', 'Bengkulu', 'Lampung', 'Kepulauan Bangka Belitung', 'Kepulauan Riau'],
+    'Kalimantan': ['Kalimantan Barat', 'Kalimantan Tengah', 'Kalimantan Selatan', 'Kalimantan Timur', 'Kalimantan Utara'],
+    'Sulawesi': ['Sulawesi Utara', 'Sulawesi Tengah', 'Sulawesi Selatan', 'Sulawesi Tenggara', 'Gorontalo', 'Sulawesi Barat']
+}
+
+# Inverse lookup used to tag every row with its region once at load time
+PROVINCE_REGION = {prov: region for region, provs in REGIONS.items() for prov in provs}
+REGION_DTYPE = pd.CategoricalDtype(list(REGIONS), ordered=True)
+
+CORR_FEATURES = ['Tingkat Kegemaran Membaca', 'Frekuensi Membaca', 'Jumlah Buku yang Dibaca',
+                 'APS_19_23', 'APS_16_18', 'Frekuensi Akses Internet']
+
+# Features plotted against TGM in the Correlation Analysis grid
+SCATTER_FEATURES = ['Frekuensi Membaca', 'Jumlah Buku yang Dibaca', 'APS_19_23', 'APS_16_18']
+
+APS_COLUMNS = ['APS_7_12', 'APS_13_15', 'APS_16_18', 'APS_19_23']
+APS_LABELS = ['7-12 thn', '13-15 thn', '16-18 thn', '19-23 thn']
+
+
+def add_region(provinces):
+    # Provinces outside the four tracked regions stay NaN and drop out of groupbys
+    return provinces.map(PROVINCE_REGION).astype(REGION_DTYPE)
+
+
+def load_history(path=DATA_PATH, data_hash=None, sections=None):
+    data = load_sections(path, data_hash=data_hash) if sections is None else sections
+    return build_store(data['provinces'], data.get('history'))
+
+
+def load_tables(path=DATA_PATH, data_hash=None, sections=None):
+    # sections, when given, are already fetched (by a data source adapter)
+    data = load_sections(path, data_hash=data_hash) if sections is None else sections
+
+    df = data['provinces']
+    df['Kategori'] = df['Label_TGM'].map(LABEL_MAP)
+    df['Region'] = add_region(df['Provinsi'])
+    knn_eval = data.get('knn_evaluation')
+
+    return df, knn_eval
+
+
+@dataclass(frozen=True)
+class TrendLine:
+    feature: str
+    r: float
+    slope: float
+    intercept: float
+    x: np.ndarray
+    y: np.ndarray
+
+
+@dataclass(frozen=True)
+class DashboardModel:
+    # Every derived aggregate the page renders. Shared between sessions, so
+    # treat all members (including the frames) as read-only.
+    data_hash: str
+    versions: MappingProxyType
+    df: pd.DataFrame
+    knn_eval: MappingProxyType
+    pca: object
+    importance: object
+    neighbors: object
+    scorer: object
+    history: object
+    total_provinces: int
+    tinggi_count: int
+    avg_tgm: float
+    min_tgm: float
+    max_tgm: float
+    best_k: int
+    best_accuracy: float
+    top_province: str
+    corr_tgm_aps: float
+    top_region: str
+    top_region_tgm: float
+    categories: MappingProxyType
+    corr_matrix: pd.DataFrame
+    trends: MappingProxyType
+    region_stats: pd.DataFrame
+    region_perf: pd.DataFrame
+    aps_means: tuple
+    top_15: pd.DataFrame
+    top_5: pd.DataFrame
+    top_8: pd.DataFrame
+    # Boolean row mask over df when a filter is applied, else None
+    mask: object = None
+
+    def version(self, *sections):
+        # Content version of the given sections. Data sections fall back to the
+        # whole file hash when per-section versions are not tracked; anything
+        # the model does not have (an absent optional table, no filter) is None.
+        tracked = not self.versions.keys().isdisjoint(SECTIONS)
+        return tuple(
+            self.versions.get(section, None if tracked or section not in SECTIONS else self.data_hash)
+            for section in sections
+        )
+
+    def selected_provinces(self):
+        # Names of the rows the filters keep, or None when nothing is filtered
+        return None if self.mask is None else self.df['Provinsi'].to_numpy()[self.mask]
+
+
+def correlation_engine(df, columns=CORR_FEATURES, target=TGM_COL, trend_points=100, rows=None):
+    # One centered matrix product gives the full covariance; correlations,
+    # least-squares fits of target on every column and the trend-line samples
+    # are all read off it, so another feature costs one more column.
+    X = df[columns].to_numpy(dtype=float)
+    if rows is not None:
+        X = X[rows]
+    Xc = X - X.mean(axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = Xc.T @ Xc / (len(X) - 1)
+        std = np.sqrt(np.diag(cov))
+        corr = cov / np.outer(std, std)
+        t = columns.index(target)
+        slopes = cov[:, t] / np.diag(cov)
+    intercepts = X[:, t].mean() - slopes * X.mean(axis=0)
+
+    steps = np.linspace(0.0, 1.0, trend_points)[:, None]
+    lo, hi = X.min(axis=0), X.max(axis=0)
+    x_trend = lo + (hi - lo) * steps
+    y_trend = slopes * x_trend + intercepts
+
+    corr_matrix = pd.DataFrame(corr, index=columns, columns=columns)
+    trends = {
+        col: TrendLine(
+            feature=col,
+            r=corr[i, t],
+            slope=slopes[i],
+            intercept=intercepts[i],
+            x=x_trend[:, i],
+            y=y_trend[:, i]
+        )
+        for i, col in enumerate(columns) if col != target
+    }
+    return corr_matrix, trends
+
+
+def _region_stats(codes, tgm):
+    # Per-region aggregates from the Region category codes in one bincount pass
+    # each, in REGIONS order; rows outside the tracked regions (code -1) drop out
+    tracked = codes >= 0
+    codes, tgm = codes[tracked], tgm[tracked]
+    n_regions = len(REGION_DTYPE.categories)
+
+    count = np.bincount(codes, minlength=n_regions)
+    total = np.bincount(codes, weights=tgm, minlength=n_regions)
+    high = np.full(n_regions, -np.inf)
+    low = np.full(n_regions, np.inf)
+    np.maximum.at(high, codes, tgm)
+    np.minimum.at(low, codes, tgm)
+
+    seen = count > 0
+    return pd.DataFrame({
+        'Region': np.asarray(REGION_DTYPE.categories, dtype=object)[seen],
+        'Avg_TGM': total[seen] / count[seen],
+        'Count': count[seen],
+        'Max': high[seen],
+        'Min': low[seen],
+    })
+
+
+def static_stats(df):
+    # Statistics of the whole provinces table that stay fixed under filters:
+    # the correlation heatmap and the headline TGM x APS correlation
+    corr_matrix, _ = correlation_engine(df, CORR_FEATURES, trend_points=2)
+    return dict(
+        corr_tgm_aps=corr_matrix.loc[TGM_COL, 'APS_19_23'],
+        corr_matrix=corr_matrix
+    )
+
+
+def subset_stats(df, mask=None):
+    # Statistics over the rows selected by a boolean mask. Aggregates gather only
+    # the columns they read, and whole rows are materialized just for the top-N
+    # tables, so filtering never copies the provinces frame.
+    rows = np.arange(len(df)) if mask is None else np.flatnonzero(mask)
+    tgm = df[TGM_COL].to_numpy(dtype=float)[rows]
+    kategori = df['Kategori'].to_numpy()[rows]
+
+    region_stats = _region_stats(df['Region'].cat.codes.to_numpy()[rows], tgm)
+    if len(region_stats):
+        top_region_row = region_stats.loc[region_stats['Avg_TGM'].idxmax()]
+    else:
+        # Only provinces outside the tracked regions are selected
+        top_region_row = {'Region': '-', 'Avg_TGM': np.nan}
+    # Descending TGM with ties in row order, like nlargest(keep='first')
+    ranked = rows[np.argsort(-tgm, kind='stable')]
+    _, trends = correlation_engine(df, [TGM_COL] + SCATTER_FEATURES, rows=rows)
+
+    return dict(
+        total_provinces=len(rows),
+        tinggi_count=int((kategori == 'Tinggi').sum()),
+        avg_tgm=tgm.mean(),
+        min_tgm=tgm.min(),
+        max_tgm=tgm.max(),
+        top_province=df['Provinsi'].iat[ranked[0]],
+        top_region=top_region_row['Region'],
+        top_region_tgm=top_region_row['Avg_TGM'],
+        categories=MappingProxyType(pd.Series(kategori, name='Kategori').value_counts().to_dict()),
+        trends=MappingProxyType(trends),
+        region_stats=region_stats,
+        region_perf=region_stats.sort_values('Avg_TGM', ascending=False).reset_index(drop=True),
+        aps_means=tuple(df[APS_COLUMNS].to_numpy(dtype=float)[rows].mean(axis=0)),
+        top_15=df.iloc[ranked[:15]].sort_values(TGM_COL),
+        top_5=df.iloc[ranked[:5]],
+        top_8=df.iloc[ranked[:8]]
+    )
+
+
+def province_stats(df):
+    # Everything derived from the provinces table alone, so it can be cached
+    # independently of the KNN and PCA sections
+    return MappingProxyType({**static_stats(df), **subset_stats(df)})
+
+
+def build_model(df, knn_eval, pca, history=None, data_hash='', versions=None, stats=None, importance=None,
+                neighbors=None, scorer=None):
+    if stats is None:
+        stats = province_stats(df)
+    if history is None:
+        history = build_store(df)
+    if importance is None:
+        importance = permutation_importance(df, knn_eval['best_k'])
+    if neighbors is None:
+        neighbors = build_index(df)
+    if scorer is None:
+        scorer = build_scorer(df, knn_eval['best_k'])
+
+    return DashboardModel(
+        data_hash=data_hash,
+        versions=MappingProxyType(dict(versions or {})),
+        df=df,
+        knn_eval=MappingProxyType(dict(knn_eval)),
+        pca=pca,
+        importance=importance,
+        neighbors=neighbors,
+        scorer=scorer,
+        history=history,
+        best_k=knn_eval['best_k'],
+        best_accuracy=knn_eval['best_accuracy'] * 100,
+        **stats
+    )
+
+
+def filter_model(model, mask, version, stats=None):
+    # Same model narrowed to the rows in mask. Filter-dependent statistics are
+    # recomputed (or taken from stats); the static ones and the KNN, PCA and
+    # history results are shared. version identifies the selected rows and is
+    # tracked as the 'filter' section, so only charts that read it are rebuilt.
+    if stats is None:
+        stats = subset_stats(model.df, mask)
+    return replace(
+        model,
+        versions=MappingProxyType({**model.versions, 'filter': version}),
+        mask=mask,
+        **stats
+    )
+
+
+def load_model(path=DATA_PATH):
+    # Same hash and section versions the app's watcher reports for the file
+    data_hash, versions, _ = DataWatcher(path).poll()
+    df, _ = load_tables(path, data_hash=data_hash)
+    history = load_history(path, data_hash=data_hash)
+    return build_model(df, evaluate_knn(df), project_pca(df), history, data_hash=data_hash, versions=versions)
@@ -0,0 +1,201 @@
+import argparse
+import hashlib
+import json
+import os
+import threading
+from types import MappingProxyType
+
+import pandas as pd
+import pyarrow as pa
+
+CODE_DIR = os.path.dirname(os.path.abspath(__file__))
+# DASHBOARD_DATA points the app (and the CLIs' defaults) at another data file;
+# without it the app reads the file shipped next to the code, from any cwd
+DATA_PATH = os.environ.get('DASHBOARD_DATA') or os.path.join(CODE_DIR, 'dashboard_data.json')
+
+# Tabular sections get their own Arrow IPC file; the small dict sections ride
+# along as JSON in the provinces file's schema metadata.
+TABLES = ('provinces',)
+# May be absent: the pipeline's PCA projection (the app projects its own) and
+# earlier survey years (Provinsi, Tahun and metric columns)
+OPTIONAL_TABLES = ('pca_data', 'history')
+META_SECTIONS = ('statistics', 'knn_evaluation')
+SECTIONS = TABLES + OPTIONAL_TABLES + META_SECTIONS
+META_KEY = b'dashboard'
+SOURCE_KEY = b'source_sha256'
+
+
+def resolve_path(path=DATA_PATH):
+    # Paths given on the command line or in the environment are relative to the
+    # working directory, like any other CLI argument
+    return os.path.abspath(path)
+
+
+def file_hash(path=DATA_PATH):
+    h = hashlib.sha256()
+    with open(resolve_path(path), 'rb') as f:
+        for chunk in iter(lambda: f.read(1 << 20), b''):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def read_raw(path=DATA_PATH):
+    with open(resolve_path(path), 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def columnar_path(path, table):
+    stem = os.path.splitext(resolve_path(path))[0]
+    return f'{stem}.{table}.arrow'
+
+
+def has_columnar(path=DATA_PATH):
+    return all(os.path.exists(columnar_path(path, t)) for t in TABLES)
+
+
+def _read_table(path, table):
+    # Memory-mapped and uncompressed, so numeric columns are not copied on read
+    reader = pa.ipc.open_file(pa.memory_map(columnar_path(path, table), 'r'))
+    return reader.read_all()
+
+
+def columnar_source_hash(path=DATA_PATH):
+    reader = pa.ipc.open_file(pa.memory_map(columnar_path(path, 'provinces'), 'r'))
+    return (reader.schema.metadata or {}).get(SOURCE_KEY, b'').decode()
+
+
+def data_version(path=DATA_PATH):
+    # Content hash of the JSON source; a columnar-only deployment falls back
+    # to the hash the converter recorded.
+    if os.path.exists(resolve_path(path)):
+        return file_hash(path)
+    return columnar_source_hash(path)
+
+
+def read_columnar(path=DATA_PATH):
+    sections = {}
+    for table in TABLES + OPTIONAL_TABLES:
+        if table in OPTIONAL_TABLES and not os.path.exists(columnar_path(path, table)):
+            continue
+        arrow_table = _read_table(path, table)
+        sections[table] = arrow_table.to_pandas(split_blocks=True)
+        if table == 'provinces':
+            sections.update(json.loads(arrow_table.schema.metadata[META_KEY]))
+    return sections
+
+
+def read_json(path=DATA_PATH):
+    # Only the sections the file has; schema.validate decides which are required
+    data = read_raw(path)
+    sections = {key: data[key] for key in META_SECTIONS if key in data}
+    for table in TABLES + OPTIONAL_TABLES:
+        if table in data:
+            sections[table] = pd.DataFrame(data[table])
+    return sections
+
+
+def load_sections(path=DATA_PATH, data_hash=None):
+    # Prefer the columnar files, but only while they still describe the JSON
+    # next to them; a rewritten JSON falls back until the converter reruns.
+    if has_columnar(path):
+        if not os.path.exists(resolve_path(path)):
+            return read_columnar(path)
+        if data_hash is None:
+            data_hash = file_hash(path)
+        if columnar_source_hash(path) == data_hash:
+            return read_columnar(path)
+    return read_json(path)
+
+
+def write_columnar(path=DATA_PATH):
+    data = read_raw(path)
+    metadata = {SOURCE_KEY: file_hash(path).encode()}
+
+    written = []
+    for table in TABLES + OPTIONAL_TABLES:
+        if table not in data:
+            stale = columnar_path(path, table)
+            if os.path.exists(stale):
+                os.remove(stale)
+            continue
+        arrow_table = pa.Table.from_pandas(pd.DataFrame(data[table]), preserve_index=False)
+        table_meta = dict(metadata)
+        if table == 'provinces':
+            table_meta[META_KEY] = json.dumps({key: data[key] for key in META_SECTIONS if key in data}).encode()
+        arrow_table = arrow_table.replace_schema_metadata(table_meta)
+
+        out_path = columnar_path(path, table)
+        tmp_path = out_path + '.tmp'
+        with pa.OSFile(tmp_path, 'wb') as sink:
+            with pa.ipc.new_file(sink, arrow_table.schema) as writer:
+                writer.write_table(arrow_table)
+        os.replace(tmp_path, out_path)
+        written.append(out_path)
+    return written
+
+
+def section_hashes(data):
+    return {
+        key: hashlib.sha256(json.dumps(data[key], sort_keys=True).encode()).hexdigest()
+        for key in SECTIONS if key in data
+    }
+
+
+class DataWatcher:
+    # Cheap change detection for the data file. Every poll is a stat(); the file
+    # is hashed only when mtime or size moved, and parsed into per-section
+    # hashes only when its content actually changed. Callers key their caches
+    # on the section versions, so a rewrite that only touches knn_evaluation
+    # leaves every provinces-derived entry valid.
+
+    def __init__(self, path=DATA_PATH):
+        self.path = path
+        self.data_hash = None
+        self.versions = MappingProxyType({})
+        self._stat = None
+        self._lock = threading.Lock()
+
+    def _watched_path(self):
+        json_path = resolve_path(self.path)
+        if os.path.exists(json_path):
+            return json_path
+        return columnar_path(self.path, 'provinces')
+
+    def poll(self):
+        # Returns (data_hash, versions, changed_sections)
+        with self._lock:
+            st = os.stat(self._watched_path())
+            stat_key = (st.st_mtime_ns, st.st_size)
+            if stat_key == self._stat:
+                return self.data_hash, self.versions, frozenset()
+            self._stat = stat_key
+
+            data_hash = data_version(self.path)
+            if data_hash == self.data_hash:
+                return self.data_hash, self.versions, frozenset()
+
+            if os.path.exists(resolve_path(self.path)):
+                versions = section_hashes(read_raw(self.path))
+            else:
+                versions = {key: data_hash for key in SECTIONS}
+            changed = frozenset(k for k in SECTIONS if versions.get(k) != self.versions.get(k))
+
+            self.data_hash = data_hash
+            self.versions = MappingProxyType(versions)
+            return self.data_hash, self.versions, changed
+
+    def load(self, data_hash=None):
+        return load_sections(self.path, data_hash=data_hash)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert dashboard JSON into columnar Arrow files.')
+    parser.add_argument('path', nargs='?', default=DATA_PATH, help='source JSON file')
+    args = parser.parse_args()
+
+    for out_path in write_columnar(args.path):
+        print(out_path)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import argparse
+import copyreg
+import hashlib
+import io
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from types import MappingProxyType
+
+CACHE_DIR_ENV = 'DASHBOARD_CACHE_DIR'
+CACHE_BYTES_ENV = 'DASHBOARD_CACHE_BYTES'
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+DB_NAME = 'dashboard_cache.sqlite'
+# Part of every key. The file outlives deploys, so bump this whenever a cached
+# value changes type or shape (as with artifacts.BUNDLE_FORMAT); entries of the
+# old format then simply miss and age out.
+CACHE_FORMAT = 3
+
+# Seconds a process waits for another one holding the write lock
+BUSY_TIMEOUT = 30
+# A hit refreshes the entry's access time at most this often (seconds), and
+# only when the write lock is free
+TOUCH_INTERVAL = 60
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    namespace TEXT NOT NULL,
+    value BLOB NOT NULL,
+    size INTEGER NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+"""
+
+
+def _frozen(mapping):
+    return MappingProxyType(mapping)
+
+
+class _Pickler(pickle.Pickler):
+    # The model freezes its mappings in MappingProxyType, which pickle refuses
+    dispatch_table = copyreg.dispatch_table.copy()
+    dispatch_table[MappingProxyType] = lambda proxy: (_frozen, (dict(proxy),))
+
+
+def dumps(value):
+    buf = io.BytesIO()
+    _Pickler(buf, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+    return buf.getvalue()
+
+
+def cache_key(key):
+    # Keys are tuples of section versions, names and params, whose repr is stable
+    # across processes
+    return hashlib.sha256(repr((CACHE_FORMAT, key)).encode()).hexdigest()
+
+
+class DiskCache:
+    # Cache tier shared by every Streamlit process on the host: one SQLite file
+    # in WAL mode, so readers never block and writers queue on the busy timeout.
+    # Entries carry their pickled size and last access time; a write that takes
+    # the total over max_bytes evicts least recently used entries first. Hits
+    # refresh the access time only now and then, and skip it rather than wait
+    # while another process writes.
+    # Values are pickled, so the directory must only be writable by the app.
+
+    def __init__(self, directory, max_bytes=DEFAULT_MAX_BYTES):
+        os.makedirs(directory, exist_ok=True)
+        self.path = os.path.join(directory, DB_NAME)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._local = threading.local()
+        self._connect().executescript(_SCHEMA)
+
+    def _connect(self):
+        # sqlite3 connections are per thread; Streamlit runs sessions on several
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=BUSY_TIMEOUT, isolation_level=None)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def get(self, key, default=None):
+        conn = self._connect()
+        digest = cache_key(key)
+        row = conn.execute('SELECT value, accessed FROM entries WHERE key = ?', (digest,)).fetchone()
+        if row is None:
+            self.misses += 1
+            return default
+        now = time.time()
+        if now - row[1] >= TOUCH_INTERVAL:
+            self._touch(conn, digest, now)
+        self.hits += 1
+        return pickle.loads(row[0])
+
+    def _touch(self, conn, digest, now):
+        # LRU order only needs to be roughly right, so a busy writer wins
+        conn.execute('PRAGMA busy_timeout = 0')
+        try:
+            conn.execute('UPDATE entries SET accessed = ? WHERE key = ?', (now, digest))
+        except sqlite3.OperationalError:
+            pass
+        finally:
+            conn.execute(f'PRAGMA busy_timeout = {BUSY_TIMEOUT * 1000}')
+
+    def set(self, key, value):
+        blob = dumps(value)
+        if len(blob) > self.max_bytes:
+            return
+        conn = self._connect()
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            conn.execute(
+                'INSERT OR REPLACE INTO entries (key, namespace, value, size, accessed) VALUES (?, ?, ?, ?, ?)',
+                (cache_key(key), str(key[0]), blob, len(blob), time.time())
+            )
+            self._evict(conn)
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+
+    def _evict(self, conn):
+        total = conn.execute('SELECT COALESCE(SUM(size), 0) FROM entries').fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for digest, size in conn.execute('SELECT key, size FROM entries ORDER BY accessed'):
+            if total <= self.max_bytes:
+                break
+            stale.append((digest,))
+            total -= size
+        conn.executemany('DELETE FROM entries WHERE key = ?', stale)
+
+    def get_or_set(self, key, compute):
+        # Several processes may compute the same value at once; the last write
+        # wins and the values are identical, so no cross-process lock is needed
+        missing = object()
+        value = self.get(key, missing)
+        if value is missing:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def stats(self):
+        conn = self._connect()
+        return conn.execute(
+            'SELECT namespace, COUNT(*), SUM(size) FROM entries GROUP BY namespace ORDER BY namespace'
+        ).fetchall()
+
+    def clear(self):
+        self._connect().execute('DELETE FROM entries')
+
+
+def open_cache():
+    # Enabled by pointing DASHBOARD_CACHE_DIR at a directory shared by the
+    # Streamlit processes; None keeps every cache in process memory only
+    directory = os.environ.get(CACHE_DIR_ENV)
+    if not directory:
+        return None
+    return DiskCache(directory, int(os.environ.get(CACHE_BYTES_ENV, DEFAULT_MAX_BYTES)))
+
+
+def cached(cache, key, compute):
+    if cache is None:
+        return compute()
+    return cache.get_or_set(key, compute)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect or clear the shared dashboard disk cache.')
+    parser.add_argument('directory', nargs='?', default=os.environ.get(CACHE_DIR_ENV), help='cache directory')
+    parser.add_argument('--clear', action='store_true', help='drop every entry')
+    args = parser.parse_args()
+    if not args.directory:
+        parser.error(f'no cache directory given and {CACHE_DIR_ENV} is not set')
+
+    cache = DiskCache(args.directory)
+    if args.clear:
+        cache.clear()
+    for namespace, count, size in cache.stats():
+        print(f'{namespace:<12} {count:>6} entries {size / 1024:>10.1f} KB')
+
+
+if __name__ == '__main__':
+    main()
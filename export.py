@@ -0,0 +1,211 @@
+import argparse
+import hashlib
+import html
+import json
+import os
+import shutil
+import time
+from concurrent.futures import ProcessPoolExecutor
+from importlib.util import find_spec
+
+import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.offline import get_plotlyjs
+
+from dashboard_model import REGIONS, SCATTER_FEATURES, filter_model, load_model, subset_stats
+from data_store import DATA_PATH, load_sections
+from figures import FigureCache
+from filters import FilterSpec, combine_masks, mask_version, term_mask
+from schema import validate
+
+TITLE = 'KNN LITERATION ANALYTICS REPORT 2024'
+IMAGE_FORMATS = ('png', 'svg', 'pdf')
+IMAGE_WIDTH = 900
+IMAGE_SCALE = 2
+# The template's translucent paper over the report's page colour; images have
+# no page behind them
+IMAGE_BACKGROUND = '#001124'
+
+# (chart, params, heading) in page order; the trend's year is set per report
+PANELS = [
+    ('trend', {}, '📈 TGM Score Trend'),
+    ('corr', {}, '🔥 Feature Correlation'),
+    ('category', {}, '📊 Category Distribution'),
+    ('regional', {}, '🗺️ Regional Performance'),
+    ('pca', {}, '🧭 PCA Projection'),
+    ('top5', {}, '🏆 Top 5 Provinsi by TGM Score'),
+    ('knn', {}, '🎯 KNN Model Evaluation'),
+    ('aps', {}, '📉 APS Decline by Age Group'),
+    ('region_pie', {}, '🗺️ TGM by Region'),
+    ('feature_importance', {}, '📚 Feature Importance'),
+    *[('scatter', {'feature': feature}, f'🔬 TGM vs {feature}') for feature in SCATTER_FEATURES],
+    ('top8', {}, '👥 Top 8 Provinsi'),
+]
+
+_CSS = """
+body { background: #000814; color: #4dd0e1; font-family: 'Rajdhani', sans-serif; margin: 0; }
+header { background: linear-gradient(90deg, #001a33 0%, #003366 50%, #001a33 100%); padding: 25px;
+         border-bottom: 3px solid #00d9ff; text-align: center; }
+h1 { color: #00d9ff; margin: 0; font-size: 2.2rem; }
+h2 { color: #4dd0e1; margin: 8px 0 0; font-size: 1rem; font-weight: 500; }
+h3 { color: #00d9ff; font-size: 1rem; margin: 0 0 6px; }
+.metrics { display: grid; grid-template-columns: repeat(7, 1fr); gap: 10px; padding: 15px 25px; }
+.metric-box { background: #001a33; border: 1px solid #00d9ff; border-radius: 8px; padding: 10px; text-align: center; }
+.metric-label { font-size: 0.7rem; font-weight: 600; }
+.metric-value { color: #00d9ff; font-size: 1.3rem; font-weight: 700; }
+.charts { display: grid; grid-template-columns: repeat(2, 1fr); gap: 15px; padding: 0 25px 25px; }
+.chart { background: #001a33; border: 1px solid #003366; border-radius: 8px; padding: 10px; }
+footer { text-align: center; padding: 15px; border-top: 2px solid #00d9ff; color: #00d9ff; font-weight: 600; }
+"""
+
+
+def _slug(text):
+    return ''.join(c if c.isalnum() else '_' for c in str(text)).strip('_').lower()
+
+
+def report_name(region=None, year=None):
+    return '-'.join(_slug(part) for part in (region or 'all', year) if part is not None)
+
+
+def region_model(model, region):
+    # Same narrowing the sidebar's Region filter applies in the app
+    if region is None:
+        return model
+    masks = [term_mask(model.df, term) for term in FilterSpec(regions=(region,)).terms()]
+    mask = combine_masks(masks, len(model.df))
+    if not mask.any():
+        return None
+    return filter_model(model, mask, mask_version(mask), subset_stats(model.df, mask))
+
+
+def _metrics(model):
+    metrics = [
+        ('🏆 TOP PROVINSI', model.top_province[:15]),
+        ('🌍 TOP REGION', model.top_region),
+        ('📊 AVG TGM SCORE', f'{model.avg_tgm:.2f}'),
+        ('🎯 BEST K VALUE', f'K = {model.best_k}'),
+        ('🎯 ACCURACY', f'{model.best_accuracy:.1f}%'),
+        ('🔗 CORRELATION', f'r={model.corr_tgm_aps:.3f}'),
+        ('⚙️ DATASET', f'{model.total_provinces} Prov'),
+    ]
+    return ''.join(
+        f"<div class='metric-box'><div class='metric-label'>{html.escape(label)}</div>"
+        f"<div class='metric-value'>{html.escape(str(value))}</div></div>"
+        for label, value in metrics
+    )
+
+
+def render_html(model, charts, subtitle):
+    # One self-contained page: plotly.js is inlined once and every chart is its
+    # compact spec, so the file opens offline and charts stay interactive
+    blocks = []
+    for i, (heading, spec) in enumerate(charts):
+        # A spec's hovertemplates contain '</b>', which must not close the script tag
+        spec = spec.replace('</', '<\\/')
+        blocks.append(
+            f"<div class='chart'><h3>{html.escape(heading)}</h3><div id='chart-{i}'></div>"
+            f"<script>(function () {{ var fig = {spec}; "
+            f"Plotly.newPlot('chart-{i}', fig.data, fig.layout, {{displayModeBar: false, responsive: true}}); }})();</script>"
+            f"</div>"
+        )
+    return (
+        f"<!DOCTYPE html><html><head><meta charset='utf-8'><title>{html.escape(TITLE)}</title>"
+        f"<style>{_CSS}</style><script>{get_plotlyjs()}</script></head><body>"
+        f"<header><h1>⚡ {html.escape(TITLE)} ⚡</h1><h2>{html.escape(subtitle)}</h2></header>"
+        f"<div class='metrics'>{_metrics(model)}</div>"
+        f"<div class='charts'>{''.join(blocks)}</div>"
+        f"<footer>⚡ POWERED BY K-NEAREST NEIGHBORS | K={model.best_k} | ACCURACY: {model.best_accuracy:.1f}% | "
+        f"{model.total_provinces} PROVINSI INDONESIA 2024 ⚡</footer>"
+        f"</body></html>"
+    )
+
+
+def render_images(spec, targets, formats):
+    # Runs in a worker process: draws one chart once per format and copies the
+    # file to every report that shows the same chart
+    fig = go.Figure(json.loads(spec), _validate=False)
+    fig.layout.paper_bgcolor = IMAGE_BACKGROUND
+    for fmt in formats:
+        image = pio.to_image(fig, format=fmt, width=IMAGE_WIDTH, scale=IMAGE_SCALE, validate=False)
+        first, *rest = targets
+        with open(f'{first}.{fmt}', 'wb') as f:
+            f.write(image)
+        for target in rest:
+            shutil.copyfile(f'{first}.{fmt}', f'{target}.{fmt}')
+    return len(targets)
+
+
+def export_reports(model, out, regions=(None,), years=(None,), formats=('png',), workers=None):
+    # Writes <out>/<report>/report.html plus charts/<chart>.<fmt> for every
+    # region x year. Specs come from one FigureCache, so a chart that a filter
+    # does not touch is built once for the whole batch, and identical specs are
+    # drawn once in the process pool.
+    figure_cache = FigureCache(maxsize=len(PANELS) * len(regions) * len(years))
+    images = {}
+    written = []
+    for region in regions:
+        variant = region_model(model, region)
+        if variant is None:
+            print(f'skipping {region}: no provinces')
+            continue
+        for year in years:
+            name = report_name(region, year)
+            chart_dir = os.path.join(out, name, 'charts')
+            os.makedirs(chart_dir, exist_ok=True)
+
+            charts = []
+            for chart, params, heading in PANELS:
+                if chart == 'trend' and year is not None:
+                    params = {'year': year}
+                spec = figure_cache.spec(chart, variant, **params)
+                charts.append((heading, spec))
+                target = os.path.join(chart_dir, '-'.join([chart, *map(_slug, params.values())]))
+                images.setdefault(hashlib.sha1(spec.encode()).hexdigest(), (spec, []))[1].append(target)
+
+            subtitle = ' | '.join(str(part) for part in (region or 'Semua Region', year) if part is not None)
+            path = os.path.join(out, name, 'report.html')
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(render_html(variant, charts, subtitle))
+            written.append(path)
+
+    if formats:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            jobs = [pool.submit(render_images, spec, targets, tuple(formats)) for spec, targets in images.values()]
+            for job in jobs:
+                job.result()
+    return written, len(images)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the dashboard as static HTML reports and chart images.')
+    parser.add_argument('path', nargs='?', default=DATA_PATH, help='source JSON file')
+    parser.add_argument('--out', default='reports', help='output directory')
+    parser.add_argument('--region', action='append', choices=list(REGIONS), help='report for one region (repeatable)')
+    parser.add_argument('--all-regions', action='store_true', help='one report for all provinces plus one per region')
+    parser.add_argument('--year', action='append', type=int, help='trend year to report (repeatable)')
+    parser.add_argument('--all-years', action='store_true', help='one report per survey year')
+    parser.add_argument('--formats', nargs='*', default=['png'], choices=IMAGE_FORMATS,
+                        help='chart image formats; pass none for HTML only')
+    parser.add_argument('--workers', type=int, default=None, help='image worker processes (default: CPU count)')
+    args = parser.parse_args()
+    if args.formats and find_spec('kaleido') is None:
+        parser.error('chart images need kaleido (pip install kaleido); pass --formats alone for HTML only')
+
+    start = time.perf_counter()
+    problems = validate(load_sections(args.path))
+    if problems:
+        parser.error(f'{args.path} does not match the dashboard schema:\n  ' + '\n  '.join(problems))
+    model = load_model(args.path)
+    regions = [None, *REGIONS] if args.all_regions else args.region or [None]
+    years = list(model.history.years) if args.all_years else args.year or [None]
+    unknown = set(years) - set(model.history.years) - {None}
+    if unknown:
+        parser.error(f'no survey data for {sorted(unknown)}; available years: {list(model.history.years)}')
+
+    written, charts = export_reports(model, args.out, regions, years, args.formats, args.workers)
+    print(f'wrote {len(written)} reports ({charts} distinct charts) to {args.out} '
+          f'in {time.perf_counter() - start:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,929 @@
+import base64
+import json
+import os
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+import plotly.io as pio
+
+from dashboard_model import APS_LABELS
+from knn_engine import LABEL_MAP
+
+# Bump when the look of the charts or the spec format changes so cached specs
+# are not reused
+THEME = 'futuristic-dark-v3'
+
+# Styling every chart shares, registered once as a Plotly template. Each spec
+# carries only this small template instead of Streamlit's full one plus the same
+# background, grid and font settings repeated inline; charts are sent with
+# theme=None so Streamlit does not restyle them.
+TEMPLATE = 'dashboard'
+_AXIS = dict(
+    gridcolor='rgba(0, 217, 255, 0.1)',
+    zerolinecolor='rgba(0, 217, 255, 0.2)',
+    tickfont=dict(size=9),
+    title=dict(font=dict(size=10))
+)
+pio.templates[TEMPLATE] = go.layout.Template(layout=dict(
+    paper_bgcolor='rgba(0, 26, 51, 0.5)',
+    plot_bgcolor='rgba(0, 8, 20, 0.8)',
+    font=dict(family='Rajdhani, sans-serif', color='#4dd0e1'),
+    hoverlabel=dict(bgcolor='#001a33', bordercolor='#00d9ff', font=dict(color='#ffffff')),
+    xaxis=_AXIS,
+    yaxis=_AXIS
+))
+
+# Numeric trace arrays at least this long are sent as base64 typed arrays
+# ({dtype, bdata, shape}) when that is shorter than their JSON text
+PACK_MIN_LENGTH = 8
+_INT_DTYPES = ('i1', 'i2', 'i4')
+
+# Cap on the figure JSON sent per page; charts past it are held back until asked for
+PAYLOAD_BUDGET_ENV = 'DASHBOARD_PAYLOAD_BUDGET'
+PAYLOAD_BUDGET = 1_000_000
+
+COLORS_SCATTER = {'Tinggi': '#00d9ff', 'Sedang': '#0099cc', 'Rendah': '#ef4444'}
+
+# Large-data mode for point clouds: above LARGE_DATA_ROWS the markers switch to
+# WebGL, are thinned to one per cell of a THIN_GRID x THIN_GRID grid per
+# category, and a DENSITY_BINS histogram underneath shows where the dropped
+# points were. Payload is then bounded by the grid sizes, not the row count.
+LARGE_DATA_ROWS = 2000
+THIN_GRID = 40
+DENSITY_BINS = 60
+
+def _grid_cells(x, y, bounds, grid):
+    (x0, x1), (y0, y1) = bounds
+    ix = np.clip(((x - x0) / ((x1 - x0) or 1.0) * grid).astype(int), 0, grid - 1)
+    iy = np.clip(((y - y0) / ((y1 - y0) or 1.0) * grid).astype(int), 0, grid - 1)
+    return ix * grid + iy
+
+
+def thin_points(data, x_col, y_col, bounds, grid=THIN_GRID):
+    # Keep the first row in every occupied grid cell; outliers and the overall
+    # shape survive, dense clusters collapse to a single marker
+    cells = _grid_cells(data[x_col].to_numpy(dtype=float), data[y_col].to_numpy(dtype=float), bounds, grid)
+    _, keep = np.unique(cells, return_index=True)
+    return data.iloc[np.sort(keep)]
+
+
+def density_trace(x, y, bins=DENSITY_BINS):
+    counts, x_edges, y_edges = np.histogram2d(x, y, bins=bins)
+    # Single precision is plenty for a colour scale and packs to half the bytes
+    z = np.log1p(counts.T).astype(np.float32)
+    z[counts.T == 0] = np.nan
+    return go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=z,
+        colorscale=[[0, 'rgba(0, 217, 255, 0.05)'], [1, 'rgba(0, 217, 255, 0.6)']],
+        showscale=False,
+        hoverinfo='skip'
+    )
+
+
+def point_cloud(fig, data, x_col, y_col, category_col, marker_size, opacity, hovertemplate,
+                text_col=None, customdata_col=None, mask=None):
+    # One trace per Kategori, switching to the large-data mode when needed.
+    # mask limits the cloud to a filtered subset of the rows.
+    if mask is None:
+        mask = np.ones(len(data), dtype=bool)
+    large = mask.sum() > LARGE_DATA_ROWS
+    scatter = go.Scattergl if large else go.Scatter
+    if large:
+        x = data[x_col].to_numpy(dtype=float)[mask]
+        y = data[y_col].to_numpy(dtype=float)[mask]
+        bounds = ((x.min(), x.max()), (y.min(), y.max()))
+        fig.add_trace(density_trace(x, y))
+
+    for cat in ['Tinggi', 'Sedang', 'Rendah']:
+        cat_data = data[(data[category_col] == cat).to_numpy() & mask]
+        if large:
+            cat_data = thin_points(cat_data, x_col, y_col, bounds)
+        fig.add_trace(scatter(
+            x=cat_data[x_col],
+            y=cat_data[y_col],
+            mode='markers',
+            name=cat,
+            marker=dict(
+                size=marker_size,
+                color=COLORS_SCATTER[cat],
+                line=dict(width=1, color='white'),
+                opacity=opacity
+            ),
+            text=cat_data[text_col] if text_col else None,
+            customdata=cat_data[customdata_col] if customdata_col else None,
+            hovertemplate=hovertemplate
+        ))
+
+
+# Per-feature styling of the "TGM vs X" panels in the Correlation Analysis grid
+SCATTER_PANELS = {
+    'Frekuensi Membaca': dict(
+        axis_title='Frekuensi Membaca', hover='Frek: %{x}', badge='Strong',
+        badge_color='#00d9ff', badge_bg='rgba(0, 217, 255, 0.2)'
+    ),
+    'Jumlah Buku yang Dibaca': dict(
+        axis_title='Jumlah Buku Dibaca', hover='Buku: %{x}', badge='Strong',
+        badge_color='#00d9ff', badge_bg='rgba(0, 217, 255, 0.2)'
+    ),
+    'APS_19_23': dict(
+        axis_title='APS 19-23 tahun (%)', hover='APS: %{x:.1f}%', badge='Weak ⚠️',
+        badge_color='#ef4444', badge_bg='rgba(239, 68, 68, 0.2)'
+    ),
+    'APS_16_18': dict(
+        axis_title='APS 16-18 tahun (%)', hover='APS: %{x:.1f}%', badge='Moderate ⭐',
+        badge_color='#fbbf24', badge_bg='rgba(251, 191, 36, 0.2)'
+    ),
+}
+
+
+def build_history_trend(history, year, provinces=None):
+    # Mean, range and rolling mean over the filtered provinces (all of them
+    # when provinces is None)
+    national = history.national('Tingkat Kegemaran Membaca', provinces)
+    years = list(national.index)
+    selected = national.loc[year]
+
+    fig_trend = go.Figure()
+    # Min/max band across provinces, drawn as an upper edge plus a filled lower edge
+    fig_trend.add_trace(go.Scatter(
+        x=years, y=national['max'], mode='lines',
+        line=dict(width=0), hoverinfo='skip', showlegend=False
+    ))
+    fig_trend.add_trace(go.Scatter(
+        x=years, y=national['min'], mode='lines',
+        line=dict(width=0), fill='tonexty', fillcolor='rgba(0, 217, 255, 0.1)',
+        hoverinfo='skip', showlegend=False
+    ))
+    fig_trend.add_trace(go.Scatter(
+        x=years,
+        y=national['mean'],
+        mode='lines+markers',
+        line=dict(color='#00d9ff', width=3, shape='spline'),
+        marker=dict(size=8, color='#00d9ff', line=dict(width=2, color='#0099cc')),
+        customdata=np.stack([national['min'], national['max'], national['yoy']], axis=1),
+        hovertemplate='<b>%{x}</b><br>Mean TGM: %{y:.2f}<br>Range: %{customdata[0]:.1f} - %{customdata[1]:.1f}<br>YoY: %{customdata[2]:+.2f}<extra></extra>',
+        showlegend=False
+    ))
+    fig_trend.add_trace(go.Scatter(
+        x=years,
+        y=national['rolling'],
+        mode='lines',
+        line=dict(color='#fbbf24', width=2, dash='dot'),
+        hovertemplate='<b>%{x}</b><br>Rolling mean: %{y:.2f}<extra></extra>',
+        showlegend=False
+    ))
+    # Filtered provinces may not have been surveyed in the selected year
+    if not np.isnan(selected['mean']):
+        fig_trend.add_trace(go.Scatter(
+            x=[year],
+            y=[selected['mean']],
+            mode='markers',
+            marker=dict(size=14, color='rgba(0, 0, 0, 0)', line=dict(width=3, color='#ffffff')),
+            hoverinfo='skip',
+            showlegend=False
+        ))
+
+        delta = selected['yoy']
+        delta_text = 'first year' if np.isnan(delta) else f'{delta:+.2f} YoY'
+        fig_trend.add_annotation(
+            x=year, y=selected['mean'], text=f'<b>{selected["mean"]:.1f}</b> ({delta_text})',
+            showarrow=True, arrowhead=0, arrowcolor='#4dd0e1', ax=0, ay=-30,
+            font=dict(size=10, color='#00d9ff'), bgcolor='rgba(0, 26, 51, 0.9)'
+        )
+
+    fig_trend.update_layout(
+        height=240,
+        margin=dict(l=30, r=10, t=10, b=30),
+        template=TEMPLATE,
+        xaxis=dict(showgrid=True, tickfont=dict(size=10), dtick=1),
+        yaxis=dict(showgrid=True, tickfont=dict(size=10))
+    )
+    return fig_trend
+
+
+def build_trend(model, year=None):
+    # National trend over the survey years when history is available, else the
+    # single-year top-15 profile
+    history = model.history
+    if history is not None and history.is_multi_year():
+        return build_history_trend(history, history.latest_year if year is None else year,
+                                   model.selected_provinces())
+
+    top_15 = model.top_15
+
+    fig_trend = go.Figure()
+    fig_trend.add_trace(go.Scatter(
+        x=list(range(len(top_15))),
+        y=top_15['Tingkat Kegemaran Membaca'],
+        mode='lines+markers',
+        line=dict(color='#00d9ff', width=3, shape='spline'),
+        marker=dict(size=8, color='#00d9ff', line=dict(width=2, color='#0099cc')),
+        fill='tonexty',
+        fillcolor='rgba(0, 217, 255, 0.1)',
+        hovertemplate='<b>TGM: %{y:.2f}</b><extra></extra>'
+    ))
+
+    fig_trend.update_layout(
+        height=240,
+        margin=dict(l=30, r=10, t=10, b=30),
+        template=TEMPLATE,
+        xaxis=dict(showgrid=True, showticklabels=False),
+        yaxis=dict(showgrid=True, tickfont=dict(size=10), range=[60, 85])
+    )
+    return fig_trend
+
+
+def build_corr(model):
+    corr_matrix = model.corr_matrix
+    short_labels = ['TGM', 'Frek.Baca', 'Jml.Buku', 'APS 19-23', 'APS 16-18', 'Frek.Net']
+
+    fig_corr = go.Figure(data=go.Heatmap(
+        z=corr_matrix.values,
+        x=short_labels,
+        y=short_labels,
+        colorscale=[[0, '#001a33'], [0.5, '#003366'], [0.75, '#0066cc'], [1, '#00d9ff']],
+        texttemplate='%{z:.2f}',
+        textfont=dict(size=10, color='white', weight=700),
+        hovertemplate='<b>%{x} × %{y}</b><br>Correlation: %{z:.3f}<extra></extra>',
+        colorbar=dict(title='Corr', titlefont=dict(size=10), tickfont=dict(size=9))
+    ))
+
+    fig_corr.update_layout(
+        height=250,
+        margin=dict(l=10, r=10, t=10, b=10),
+        template=TEMPLATE,
+        xaxis=dict(side='bottom')
+    )
+    return fig_corr
+
+
+def build_category(model):
+    fig_mini_cat = go.Figure()
+    cat_order = ['Tinggi', 'Sedang', 'Rendah']
+    cat_colors = ['#00d9ff', '#0099cc', '#004d99']
+    cat_values = [model.categories.get(cat, 0) for cat in cat_order]
+
+    fig_mini_cat.add_trace(go.Bar(
+        x=cat_order,
+        y=cat_values,
+        marker=dict(color=cat_colors, line=dict(color='#00d9ff', width=1)),
+        customdata=np.array(cat_values) / sum(cat_values) * 100,
+        texttemplate='%{y}',
+        textposition='outside',
+        textfont=dict(size=17, color='#00d9ff', weight=1000),
+        hovertemplate='<b>%{x}</b><br>Count: %{y}<br>Percentage: %{customdata:.1f}%<extra></extra>',
+        showlegend=False
+    ))
+
+    fig_mini_cat.update_layout(
+        height=300,
+        margin=dict(l=30, r=20, t=10, b=30),
+        template=TEMPLATE,
+        xaxis=dict(
+            showgrid=False,
+            tickfont=dict(size=11, weight=600)
+        ),
+        yaxis=dict(
+            showgrid=True,
+            tickfont=dict(size=10),
+            range=[0, max(cat_values) + 5],
+            title=dict(text='Jumlah Provinsi')
+        )
+    )
+    return fig_mini_cat
+
+
+def build_regional(model):
+    region_perf_df = model.region_perf
+
+    fig_regional = go.Figure()
+
+    colors_regional = []
+    for avg in region_perf_df['Avg_TGM']:
+        if avg >= 72:
+            colors_regional.append('#00d9ff')
+        elif avg >= 68:
+            colors_regional.append('#0099cc')
+        elif avg >= 65:
+            colors_regional.append('#006699')
+        else:
+            colors_regional.append('#004d99')
+
+    fig_regional.add_trace(go.Bar(
+        y=region_perf_df['Region'][::-1],
+        x=region_perf_df['Avg_TGM'][::-1],
+        orientation='h',
+        marker=dict(color=colors_regional[::-1], line=dict(color='#00d9ff', width=2)),
+        customdata=region_perf_df[['Count', 'Min', 'Max']][::-1].to_numpy(),
+        texttemplate='%{x:.1f}',
+        textposition='outside',
+        textfont=dict(size=13, color='#00d9ff', weight=900),
+        hovertemplate='<b>%{y}</b><br>Avg TGM: %{x:.2f}<br>Provinces: %{customdata[0]}'
+                      '<br>Range: %{customdata[1]:.1f} - %{customdata[2]:.1f}<extra></extra>',
+        showlegend=False
+    ))
+
+    avg_all = model.avg_tgm
+    fig_regional.add_vline(
+        x=avg_all,
+        line_dash="dash",
+        line_color="#fbbf24",
+        line_width=2,
+        annotation_text=f"Avg: {avg_all:.1f}",
+        annotation_position="top",
+        annotation_font_color="#fbbf24",
+        annotation_font_size=10
+    )
+
+    fig_regional.update_layout(
+        height=250,
+        margin=dict(l=30, r=50, t=10, b=30),
+        template=TEMPLATE,
+        xaxis=dict(
+            showgrid=True,
+            tickfont=dict(size=10),
+            range=[60, 75],
+            title=dict(text='Average TGM Score')
+        ),
+        yaxis=dict(showgrid=False, tickfont=dict(size=10, weight=600))
+    )
+    return fig_regional
+
+
+def build_top5(model):
+    top_5 = model.top_5
+
+    fig_top5 = go.Figure()
+    colors_gradient = ['#00d9ff', '#0099cc', '#006699', '#004d99', '#003366']
+
+    fig_top5.add_trace(go.Bar(
+        y=top_5['Provinsi'][::-1],
+        x=top_5['Tingkat Kegemaran Membaca'][::-1],
+        orientation='h',
+        marker=dict(color=colors_gradient[::-1], line=dict(color='#00d9ff', width=2)),
+        text=['$' + str(int(x)) for x in top_5['Tingkat Kegemaran Membaca'][::-1]],
+        textposition='outside',
+        textfont=dict(size=12, color='#00d9ff', weight=700),
+        hovertemplate='<b>%{y}</b><br>TGM: %{x:.2f}<extra></extra>'
+    ))
+
+    fig_top5.update_layout(
+        height=160,
+        margin=dict(l=10, r=60, t=10, b=20),
+        template=TEMPLATE,
+        xaxis=dict(showgrid=True, range=[0, 90]),
+        yaxis=dict(showgrid=False, tickfont=dict(size=11, weight=600))
+    )
+    return fig_top5
+
+
+def build_knn(model):
+    knn_eval = model.knn_eval
+    best_k = model.best_k
+    k_values = [int(k) for k in knn_eval['all_k_results'].keys()]
+    accuracies = [v * 100 for v in knn_eval['all_k_results'].values()]
+
+    fig_knn = go.Figure()
+
+    fig_knn.add_trace(go.Scatter(
+        x=k_values,
+        y=accuracies,
+        mode='lines+markers',
+        line=dict(color='#00d9ff', width=3),
+        marker=dict(
+            size=10,
+            color=accuracies,
+            colorscale=[[0, '#003366'], [0.5, '#0080ff'], [1, '#00d9ff']],
+            line=dict(width=2, color='white')
+        ),
+        hovertemplate='<b>K=%{x}</b><br>Accuracy: %{y:.2f}%<extra></extra>'
+    ))
+
+    best_idx = k_values.index(best_k)
+    fig_knn.add_trace(go.Scatter(
+        x=[best_k],
+        y=[accuracies[best_idx]],
+        mode='markers+text',
+        marker=dict(size=20, color='#fbbf24', line=dict(width=3, color='white')),
+        text=[f'BEST<br>K={best_k}'],
+        textposition='bottom center',
+        textfont=dict(size=10, color='#fbbf24', weight=700),
+        hovertemplate=f'<b>OPTIMAL K={best_k}</b><br>Accuracy: {accuracies[best_idx]:.2f}%<extra></extra>',
+        showlegend=False
+    ))
+
+    fig_knn.update_layout(
+        height=300,
+        margin=dict(l=30, r=10, t=10, b=30),
+        template=TEMPLATE,
+        xaxis=dict(
+            title='K Value',
+            showgrid=True,
+            tickvals=k_values
+        ),
+        yaxis=dict(
+            title='Accuracy (%)',
+            showgrid=True,
+            range=[max(0, min(accuracies) - 10), min(100, max(accuracies) + 10)]
+        ),
+        showlegend=False
+    )
+    return fig_knn
+
+
+def build_aps(model):
+    aps_df = pd.DataFrame({'Label': APS_LABELS, 'APS': model.aps_means})
+
+    fig_aps = go.Figure()
+
+    fig_aps.add_trace(go.Scatter(
+        x=aps_df['Label'],
+        y=aps_df['APS'],
+        mode='lines+markers',
+        line=dict(color='#00d9ff', width=3),
+        marker=dict(size=10, color='#00d9ff', line=dict(width=2, color='white')),
+        fill='tozeroy',
+        fillcolor='rgba(0, 217, 255, 0.2)',
+        hovertemplate='<b>%{x}</b><br>APS: %{y:.2f}%<extra></extra>'
+    ))
+
+    fig_aps.add_annotation(
+        x='19-23 thn',
+        y=aps_df['APS'].iloc[-1],
+        text='⚠️ DROP 76%',
+        showarrow=True,
+        arrowhead=2,
+        arrowsize=1,
+        arrowwidth=2,
+        arrowcolor='#ff4444',
+        ax=40,
+        ay=-40,
+        font=dict(size=11, color='#ff4444', weight=700),
+        bgcolor='rgba(255, 68, 68, 0.2)',
+        bordercolor='#ff4444',
+        borderwidth=2
+    )
+
+    fig_aps.update_layout(
+        height=250,
+        margin=dict(l=30, r=10, t=10, b=30),
+        template=TEMPLATE,
+        xaxis=dict(showgrid=False),
+        yaxis=dict(
+            title='APS (%)',
+            showgrid=True,
+            range=[0, 110]
+        )
+    )
+    return fig_aps
+
+
+def build_region_pie(model):
+    region_avg_df = model.region_stats.rename(columns={'Avg_TGM': 'TGM'})
+
+    fig_region_pie = go.Figure(data=[go.Pie(
+        labels=region_avg_df['Region'],
+        values=region_avg_df['TGM'],
+        hole=0.5,
+        marker=dict(
+            colors=['#00d9ff', '#0099cc', '#006699', '#004d99'],
+            line=dict(color='#000814', width=2)
+        ),
+        textinfo='label+percent',
+        textfont=dict(size=9, color='white', weight=600),
+        hovertemplate='<b>%{label}</b><br>Avg TGM: %{value:.2f}<extra></extra>'
+    )])
+
+    fig_region_pie.add_annotation(
+        text=f"<b>AVG</b><br>{region_avg_df['TGM'].mean():.1f}",
+        x=0.5, y=0.5,
+        font=dict(size=16, color='#00d9ff'),
+        showarrow=False
+    )
+
+    fig_region_pie.update_layout(
+        height=250,
+        margin=dict(l=0, r=0, t=0, b=0),
+        template=TEMPLATE,
+        showlegend=False
+    )
+    return fig_region_pie
+
+
+FEATURE_LABELS = {
+    'Frekuensi Membaca': 'Frek.Baca',
+    'Durasi Membaca1': 'Durasi',
+    'Jumlah Buku yang Dibaca': 'Jml.Buku',
+    'Frekuensi Akses Internet': 'Frek.Net',
+    'Durasi Akses Internet1': 'Durasi Net',
+    'APS_7_12': 'APS 7-12',
+    'APS_13_15': 'APS 13-15',
+    'APS_16_18': 'APS 16-18',
+    'APS_19_23': 'APS 19-23',
+}
+
+
+def build_feature_importance(model):
+    # Top 5 features by permutation importance: the drop in leave-one-out
+    # accuracy (percentage points) when the feature is shuffled
+    top = model.importance.importances.head(5)
+    features_short = [FEATURE_LABELS.get(f, f) for f in top['Feature']]
+    colors_feat = ['#00d9ff', '#00d9ff', '#0099cc', '#006699', '#004d99'][:len(top)]
+
+    fig_feat = go.Figure()
+    fig_feat.add_trace(go.Bar(
+        y=features_short[::-1],
+        x=(top['Mean'] * 100)[::-1],
+        error_x=dict(type='data', array=(top['Std'] * 100)[::-1], color='#4dd0e1', thickness=1),
+        orientation='h',
+        marker=dict(color=colors_feat[::-1], line=dict(color='#00d9ff', width=1)),
+        texttemplate='%{x:.1f}',
+        textposition='outside',
+        textfont=dict(size=10, color='#00d9ff', weight=600),
+        hovertemplate=f'<b>%{{y}}</b><br>Accuracy drop at k={model.importance.k}: %{{x:.1f}} pts<extra></extra>'
+    ))
+
+    fig_feat.update_layout(
+        height=180,
+        margin=dict(l=10, r=30, t=10, b=10),
+        template=TEMPLATE,
+        xaxis=dict(showgrid=True),
+        yaxis=dict(showgrid=False, automargin=True)
+    )
+    return fig_feat
+
+
+def build_scatter(model, feature):
+    panel = SCATTER_PANELS[feature]
+    trend = model.trends[feature]
+    df = model.df
+
+    fig_scatter = go.Figure()
+
+    # Color by kategori
+    point_cloud(
+        fig_scatter, df, feature, 'Tingkat Kegemaran Membaca', 'Kategori',
+        marker_size=10, opacity=0.8,
+        hovertemplate='<b>%{text}</b><br>' + panel['hover'] + '<br>TGM: %{y:.2f}<extra></extra>',
+        text_col='Provinsi',
+        mask=model.mask
+    )
+
+    # Add trendline
+    fig_scatter.add_trace(go.Scatter(
+        x=trend.x,
+        y=trend.y,
+        mode='lines',
+        name='Trendline',
+        line=dict(color='#fbbf24', width=2, dash='dash'),
+        showlegend=False,
+        hovertemplate='Trendline<extra></extra>'
+    ))
+
+    fig_scatter.add_annotation(
+        text=f"<b>r = {trend.r:.3f}</b><br>{panel['badge']}",
+        xref='paper', yref='paper',
+        x=0.05, y=0.95,
+        showarrow=False,
+        bgcolor=panel['badge_bg'],
+        bordercolor=panel['badge_color'],
+        borderwidth=2,
+        font=dict(size=11, color=panel['badge_color'], weight=700)
+    )
+
+    fig_scatter.update_layout(
+        height=200,
+        margin=dict(l=30, r=10, t=10, b=30),
+        template=TEMPLATE,
+        xaxis=dict(
+            title=panel['axis_title'],
+            showgrid=True
+        ),
+        yaxis=dict(
+            title='TGM Score',
+            showgrid=True
+        ),
+        showlegend=False
+    )
+    return fig_scatter
+
+
+def build_pca(model):
+    coords = model.pca.coords
+    var_ratio = model.pca.explained_variance_ratio
+
+    fig_pca = go.Figure()
+
+    point_cloud(
+        fig_pca, coords, 'PC1', 'PC2', 'Kelas',
+        marker_size=9, opacity=0.85,
+        hovertemplate='<b>%{text}</b><br>PC1: %{x:.2f}<br>PC2: %{y:.2f}<br>TGM: %{customdata:.2f}<extra></extra>',
+        text_col='Provinsi',
+        customdata_col='TGM_Score',
+        mask=model.mask
+    )
+
+    fig_pca.update_layout(
+        height=260,
+        margin=dict(l=30, r=10, t=10, b=30),
+        template=TEMPLATE,
+        xaxis=dict(
+            title=f'PC1 ({var_ratio[0] * 100:.1f}%)',
+            showgrid=True
+        ),
+        yaxis=dict(
+            title=f'PC2 ({var_ratio[1] * 100:.1f}%)',
+            showgrid=True
+        ),
+        legend=dict(
+            orientation='h',
+            yanchor='bottom',
+            y=1.0,
+            xanchor='right',
+            x=1.0,
+            font=dict(size=9)
+        )
+    )
+    return fig_pca
+
+
+def build_similar(model, similar_to, k=5):
+    # Similar-provinces lookup drawn over the PCA scatter: the k nearest rows in
+    # the full KNN feature space, ringed, and the province they were found for,
+    # starred. Only the overlay traces; see overlay().
+    coords = model.pca.coords
+    fig_similar = go.Figure()
+    rows, distances = model.neighbors.similar(similar_to, k)
+    similar = coords.iloc[rows]
+    fig_similar.add_trace(go.Scatter(
+        x=similar['PC1'],
+        y=similar['PC2'],
+        mode='markers',
+        name='Similar',
+        marker=dict(size=16, color='rgba(0, 0, 0, 0)', line=dict(width=2, color='#fbbf24')),
+        text=similar['Provinsi'],
+        customdata=distances,
+        hovertemplate='<b>%{text}</b><br>Distance: %{customdata:.2f}<extra></extra>',
+        showlegend=False
+    ))
+    target = coords.iloc[[model.neighbors.row(similar_to)]]
+    fig_similar.add_trace(go.Scatter(
+        x=target['PC1'],
+        y=target['PC2'],
+        mode='markers',
+        name=similar_to,
+        marker=dict(size=18, symbol='star', color='#fbbf24', line=dict(width=1, color='white')),
+        hovertemplate=f'<b>{similar_to}</b><extra></extra>',
+        showlegend=False
+    ))
+    return fig_similar
+
+
+def build_whatif(model, x, y, point):
+    # Predicted Kategori over a grid of features x and y, every other feature
+    # held at the what-if point (starred)
+    scorer = model.scorer
+    xs, ys, labels = scorer.grid(point, x, y)
+    colors = [COLORS_SCATTER[LABEL_MAP[label]] for label in sorted(LABEL_MAP)]
+    colorscale = []
+    for i, color in enumerate(colors):
+        colorscale += [[i / len(colors), color], [(i + 1) / len(colors), color]]
+
+    fig_whatif = go.Figure()
+    fig_whatif.add_trace(go.Heatmap(
+        x=xs,
+        y=ys,
+        z=labels,
+        zmin=-0.5,
+        zmax=len(colors) - 0.5,
+        colorscale=colorscale,
+        opacity=0.6,
+        colorbar=dict(tickvals=sorted(LABEL_MAP), ticktext=[LABEL_MAP[label] for label in sorted(LABEL_MAP)],
+                      thickness=10),
+        hovertemplate=f'{x}: %{{x:.2f}}<br>{y}: %{{y:.2f}}<br>Label_TGM: %{{z}}<extra></extra>'
+    ))
+    fig_whatif.add_trace(go.Scatter(
+        x=[point[scorer.columns.index(x)]],
+        y=[point[scorer.columns.index(y)]],
+        mode='markers',
+        marker=dict(size=16, symbol='star', color='#fbbf24', line=dict(width=1, color='white')),
+        hovertemplate='What-if<extra></extra>',
+        showlegend=False
+    ))
+
+    fig_whatif.update_layout(
+        height=300,
+        margin=dict(l=30, r=10, t=10, b=30),
+        template=TEMPLATE,
+        xaxis=dict(title=x, showgrid=False),
+        yaxis=dict(title=y, showgrid=False)
+    )
+    return fig_whatif
+
+
+def build_top8(model):
+    top_8 = model.top_8
+
+    fig_top8_right = go.Figure()
+    fig_top8_right.add_trace(go.Bar(
+        y=top_8['Provinsi'][::-1],
+        x=top_8['Tingkat Kegemaran Membaca'][::-1],
+        orientation='h',
+        marker=dict(
+            color=top_8['Tingkat Kegemaran Membaca'][::-1],
+            colorscale=[[0, '#003366'], [0.5, '#0080ff'], [1, '#00d9ff']],
+            line=dict(color='#00d9ff', width=1)
+        ),
+        texttemplate='%{x:.1f}',
+        textposition='outside',
+        textfont=dict(size=17, color='#00d9ff', weight=800),
+        hovertemplate='<b>%{y}</b><br>TGM: %{x:.2f}<extra></extra>'
+    ))
+
+    fig_top8_right.update_layout(
+        height=450,
+        margin=dict(l=10, r=40, t=10, b=10),
+        template=TEMPLATE,
+        xaxis=dict(showgrid=True, range=[0, 90]),
+        yaxis=dict(showgrid=False, tickfont=dict(size=8))
+    )
+    return fig_top8_right
+
+
+# Data sections each chart is derived from; anything not listed reads provinces
+# only. 'filter' marks charts that follow the sidebar filters; the rest (KNN,
+# correlation heatmap, feature importance) describe the whole dataset and are
+# never rebuilt when a filter changes.
+FIGURE_SECTIONS = {
+    'trend': ('provinces', 'history', 'filter'),
+    'category': ('provinces', 'filter'),
+    'regional': ('provinces', 'filter'),
+    'top5': ('provinces', 'filter'),
+    'aps': ('provinces', 'filter'),
+    'region_pie': ('provinces', 'filter'),
+    'scatter': ('provinces', 'filter'),
+    'pca': ('provinces', 'filter'),
+    'top8': ('provinces', 'filter'),
+}
+
+BUILDERS = {
+    'trend': build_trend,
+    'corr': build_corr,
+    'category': build_category,
+    'regional': build_regional,
+    'top5': build_top5,
+    'knn': build_knn,
+    'aps': build_aps,
+    'region_pie': build_region_pie,
+    'feature_importance': build_feature_importance,
+    'scatter': build_scatter,
+    'pca': build_pca,
+    'top8': build_top8,
+}
+
+
+def _pack(values):
+    # One numeric data array (1-D, or 2-D like heatmap z) as a typed array spec,
+    # or unchanged when it is short, not numeric, or smaller as JSON text
+    rows = values if isinstance(values[0], list) else [values]
+    if any(not isinstance(row, list) or len(row) != len(rows[0]) for row in rows):
+        return values
+    flat = [v for row in rows for v in row]
+    if len(flat) < PACK_MIN_LENGTH:
+        return values
+    if not all(v is None or (isinstance(v, (int, float)) and not isinstance(v, bool)) for v in flat):
+        return values
+
+    if all(isinstance(v, int) for v in flat):
+        arr = np.asarray(values, dtype=np.int64)
+        dtype = next((d for d in _INT_DTYPES
+                      if np.iinfo(d).min <= arr.min() and arr.max() <= np.iinfo(d).max), None)
+        if dtype is None:
+            return values
+    else:
+        arr = np.asarray(values, dtype=float)
+        single = arr.astype(np.float32)
+        dtype = 'f4' if np.array_equal(single, arr, equal_nan=True) else 'f8'
+
+    packed = {'dtype': dtype, 'bdata': base64.b64encode(arr.astype(np.dtype(dtype).newbyteorder('<')).tobytes()).decode()}
+    if arr.ndim == 2:
+        packed['shape'] = f'{arr.shape[0]},{arr.shape[1]}'
+    if len(json.dumps(packed)) >= len(json.dumps(values, separators=(',', ':'))):
+        return values
+    return packed
+
+
+def _pack_arrays(obj):
+    for key, value in obj.items():
+        if isinstance(value, dict):
+            _pack_arrays(value)
+        elif isinstance(value, list) and value:
+            obj[key] = _pack(value)
+
+
+def compact_json(fig):
+    # Figure JSON without whitespace and with numeric trace arrays packed
+    spec = json.loads(fig.to_json())
+    for trace in spec['data']:
+        _pack_arrays(trace)
+    return json.dumps(spec, separators=(',', ':'))
+
+
+def overlay(spec, fig):
+    # A compact spec with fig's traces drawn on top, so a cached base figure can
+    # take per-session highlights without being rebuilt or re-cached
+    base = json.loads(spec)
+    base['data'] += json.loads(compact_json(fig))['data']
+    return json.dumps(base, separators=(',', ':'))
+
+
+class PayloadBudget:
+    # Bytes of figure JSON on the page per chart key, against a cap. Sizes are
+    # keyed so a fragment rerun replaces its charts' sizes instead of adding.
+
+    def __init__(self, limit=None):
+        if limit is None:
+            limit = int(os.environ.get(PAYLOAD_BUDGET_ENV, PAYLOAD_BUDGET))
+        self.limit = limit
+        self.sizes = {}
+
+    @property
+    def used(self):
+        return sum(self.sizes.values())
+
+    def admit(self, key, nbytes, force=False):
+        others = self.used - self.sizes.get(key, 0)
+        if not force and others + nbytes > self.limit:
+            return False
+        self.sizes[key] = nbytes
+        return True
+
+
+class FigureCache:
+    # LRU of serialized figure specs keyed by (chart, version of the data sections
+    # it reads, theme, params).
+    # A hit rebuilds the figure from JSON without Plotly's property validation,
+    # so reruns skip both trace construction and validation.
+    # With a store (a DiskCache) memory misses fall through to specs built by
+    # other processes before building.
+
+    def __init__(self, maxsize=64, store=None):
+        self.maxsize = maxsize
+        self.store = store
+        self.hits = 0
+        self.misses = 0
+        self._specs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def key(self, name, model, **params):
+        version = model.version(*FIGURE_SECTIONS.get(name, ('provinces',)))
+        return (name, version, THEME, tuple(sorted(params.items())))
+
+    def spec(self, name, model, **params):
+        key = self.key(name, model, **params)
+        with self._lock:
+            spec = self._specs.get(key)
+            if spec is not None:
+                self._specs.move_to_end(key)
+                self.hits += 1
+                return spec
+
+        spec = self.store.get(('figure',) + key) if self.store is not None else None
+        if spec is None:
+            spec = compact_json(BUILDERS[name](model, **params))
+            if self.store is not None:
+                self.store.set(('figure',) + key, spec)
+
+        with self._lock:
+            self.misses += 1
+            self._specs[key] = spec
+            self._specs.move_to_end(key)
+            while len(self._specs) > self.maxsize:
+                self._specs.popitem(last=False)
+        return spec
+
+    def preload(self, model, specs):
+        # Seed the LRU with specs rendered ahead of time for model, as
+        # ((name, params, spec), ...)
+        with self._lock:
+            for name, params, spec in specs:
+                key = self.key(name, model, **params)
+                self._specs[key] = spec
+                self._specs.move_to_end(key)
+            while len(self._specs) > self.maxsize:
+                self._specs.popitem(last=False)
+
+    def figure(self, name, model, **params):
+        return go.Figure(json.loads(self.spec(name, model, **params)), _validate=False)
+
+    def clear(self):
+        with self._lock:
+            self._specs.clear()
+
+    def __len__(self):
+        return len(self._specs)
@@ -0,0 +1,56 @@
+import hashlib
+from dataclasses import dataclass
+
+import numpy as np
+
+from dashboard_model import APS_COLUMNS, TGM_COL
+
+# Columns that can be narrowed with a range slider
+RANGE_COLUMNS = [TGM_COL] + APS_COLUMNS
+
+
+@dataclass(frozen=True)
+class FilterSpec:
+    regions: tuple = ()
+    categories: tuple = ()
+    # ((column, low, high), ...) for the range sliders that are narrowed
+    ranges: tuple = ()
+
+    def terms(self):
+        # One hashable term per active filter. Each term's mask is cached on its
+        # own, so moving one slider recomputes one mask and reuses the rest.
+        terms = []
+        if self.regions:
+            terms.append(('Region', tuple(self.regions)))
+        if self.categories:
+            terms.append(('Kategori', tuple(self.categories)))
+        for column, low, high in self.ranges:
+            terms.append((column, (low, high)))
+        return terms
+
+    def is_active(self):
+        return bool(self.terms())
+
+
+def term_mask(df, term):
+    column, value = term
+    if column in RANGE_COLUMNS:
+        low, high = value
+        values = df[column].to_numpy(dtype=float)
+        return (values >= low) & (values <= high)
+    return df[column].isin(value).to_numpy()
+
+
+def combine_masks(masks, n_rows):
+    mask = np.ones(n_rows, dtype=bool)
+    for term in masks:
+        mask &= term
+    return mask
+
+
+def mask_version(mask):
+    # Identifies the selected rows, not the filter settings, so two filters that
+    # pick the same provinces share aggregates and cached figures
+    if mask is None:
+        return None
+    return hashlib.sha1(np.packbits(mask).tobytes() + str(len(mask)).encode()).hexdigest()
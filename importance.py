@@ -0,0 +1,79 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from knn_engine import CHUNK_ELEMENTS, FEATURE_COLUMNS, LABEL_COL, N_CLASSES, feature_matrix, pairwise_sq_dist
+
+N_REPEATS = 10
+# The n x n distance matrix is the shared structure every permutation reuses,
+# so larger tables are scored on a fixed random sample of this many rows
+MAX_ROWS = 1000
+
+
+@dataclass(frozen=True)
+class ImportanceResult:
+    # Feature, Mean and Std of the drop in leave-one-out accuracy when the
+    # feature is shuffled, most important first
+    importances: pd.DataFrame
+    baseline: float
+    k: int
+    n_repeats: int
+    rows: int
+
+
+def _vote(d, y, k):
+    # Majority label of the k nearest rows along the last axis; argmax breaks
+    # ties toward the lower label, as in knn_engine.vote_all_k
+    nearest = np.argpartition(d, k - 1, axis=-1)[..., :k]
+    counts = np.eye(N_CLASSES, dtype=np.int32)[y[nearest]].sum(axis=-2)
+    return counts.argmax(axis=-1)
+
+
+def permutation_importance(df, k, n_repeats=N_REPEATS, columns=FEATURE_COLUMNS, seed=0):
+    # Permutation importance of the leave-one-out KNN classifier. Squared
+    # distances add up per feature, so shuffling feature f over the query rows
+    # only swaps its own term: D' = D - D_f + D_f[perm]. D is computed once and
+    # every (feature, repeat) permutation is scored from it in vectorized
+    # batches of bounded size.
+    rng = np.random.default_rng(seed)
+    Z = feature_matrix(df, columns)
+    y = df[LABEL_COL].to_numpy(dtype=int)
+    if len(Z) > MAX_ROWS:
+        rows = np.sort(rng.choice(len(Z), MAX_ROWS, replace=False))
+        Z, y = Z[rows], y[rows]
+    n = len(Z)
+    k = min(k, n - 1)
+
+    D = pairwise_sq_dist(Z, Z)
+    diag = np.arange(n)
+    D[diag, diag] = np.inf
+    baseline = (_vote(D, y, k) == y).mean()
+
+    jobs = [(f, rng.permutation(n)) for f in range(len(columns)) for _ in range(n_repeats)]
+    scores = np.empty(len(jobs))
+    batch = max(1, CHUNK_ELEMENTS // (n * n))
+    for start in range(0, len(jobs), batch):
+        chunk = jobs[start:start + batch]
+        feats = np.array([f for f, _ in chunk])
+        perms = np.stack([perm for _, perm in chunk])
+        col = Z[:, feats].T                                   # (b, n)
+        own = (col[:, :, None] - col[:, None, :]) ** 2        # D_f
+        shuffled = (np.take_along_axis(col, perms, axis=1)[:, :, None] - col[:, None, :]) ** 2
+        d = D[None] - own + shuffled
+        d[:, diag, diag] = np.inf
+        scores[start:start + len(chunk)] = (_vote(d, y, k) == y[None]).mean(axis=1)
+
+    drops = baseline - scores.reshape(len(columns), n_repeats)
+    importances = pd.DataFrame({
+        'Feature': list(columns),
+        'Mean': drops.mean(axis=1),
+        'Std': drops.std(axis=1),
+    }).sort_values('Mean', ascending=False, kind='stable').reset_index(drop=True)
+    return ImportanceResult(
+        importances=importances,
+        baseline=float(baseline),
+        k=int(k),
+        n_repeats=n_repeats,
+        rows=n
+    )
@@ -0,0 +1,99 @@
+import numpy as np
+
+FEATURE_COLUMNS = ['Frekuensi Membaca', 'Durasi Membaca1', 'Jumlah Buku yang Dibaca',
+                   'Frekuensi Akses Internet', 'Durasi Akses Internet1',
+                   'APS_7_12', 'APS_13_15', 'APS_16_18', 'APS_19_23']
+LABEL_COL = 'Label_TGM'
+LABEL_MAP = {0: 'Rendah', 1: 'Sedang', 2: 'Tinggi'}
+N_CLASSES = 3
+
+K_VALUES = (1, 3, 5, 7, 9, 11, 13, 15)
+
+# Distance entries per block when building neighbor lists (~64 MB of float64),
+# so memory stays bounded instead of growing with n x n
+CHUNK_ELEMENTS = 8_000_000
+# Larger tables are evaluated on a fixed random sample of this many held-out
+# rows, each still voted on by its neighbours among all the other rows
+MAX_EVAL_ROWS = 1000
+
+
+def standardize(X, mean=None, std=None):
+    X = np.asarray(X, dtype=float)
+    if mean is None:
+        mean = X.mean(axis=0)
+    if std is None:
+        std = X.std(axis=0)
+        std[std == 0] = 1.0
+    return (X - mean) / std, mean, std
+
+
+def feature_matrix(df, columns=FEATURE_COLUMNS):
+    Z, _, _ = standardize(df[columns].to_numpy(dtype=float))
+    return Z
+
+
+def pairwise_sq_dist(A, B):
+    # |a - b|^2 = |a|^2 + |b|^2 - 2ab, one matrix product for the whole block
+    d = (A * A).sum(axis=1)[:, None] + (B * B).sum(axis=1)[None, :] - 2.0 * A @ B.T
+    np.maximum(d, 0.0, out=d)
+    return d
+
+
+def neighbor_index(Q, X, kmax, exclude=None):
+    # Sorted kmax nearest rows of X for every row of Q: (indices, distances).
+    # exclude gives, per row of Q, the row of X dropped from its list (the
+    # query's own row when Q is taken from X).
+    kmax = min(kmax, len(X) - int(exclude is not None))
+    indices = np.empty((len(Q), kmax), dtype=np.intp)
+    distances = np.empty((len(Q), kmax))
+
+    chunk_rows = max(1, CHUNK_ELEMENTS // max(len(X), 1))
+    for start in range(0, len(Q), chunk_rows):
+        stop = min(start + chunk_rows, len(Q))
+        d = pairwise_sq_dist(Q[start:stop], X)
+        if exclude is not None:
+            d[np.arange(stop - start), exclude[start:stop]] = np.inf
+
+        if kmax < d.shape[1]:
+            part = np.argpartition(d, kmax - 1, axis=1)[:, :kmax]
+        else:
+            part = np.broadcast_to(np.arange(d.shape[1]), d.shape)
+        part_d = np.take_along_axis(d, part, axis=1)
+        order = np.argsort(part_d, axis=1, kind='stable')
+        indices[start:stop] = np.take_along_axis(part, order, axis=1)
+        distances[start:stop] = np.sqrt(np.take_along_axis(part_d, order, axis=1))
+
+    return indices, distances
+
+
+def vote_all_k(neighbor_labels, k_values, n_classes=N_CLASSES):
+    # Running class counts along the sorted neighbor lists give the vote for
+    # every k at once; argmax breaks ties toward the lower label.
+    one_hot = np.eye(n_classes, dtype=np.int32)[neighbor_labels]
+    counts = np.cumsum(one_hot, axis=1)
+    return np.stack([counts[:, k - 1, :].argmax(axis=1) for k in k_values])
+
+
+def evaluate(df, k_values=K_VALUES, columns=FEATURE_COLUMNS, max_rows=MAX_EVAL_ROWS, seed=0):
+    # Leave-one-out accuracy for every k from a single neighbor index. Above
+    # max_rows only a sample of rows is held out, which keeps the cost at
+    # max_rows x n distances instead of n x n.
+    Z = feature_matrix(df, columns)
+    y = df[LABEL_COL].to_numpy(dtype=int)
+    k_values = [k for k in k_values if k < len(Z)]
+    rows = np.arange(len(Z))
+    if len(Z) > max_rows:
+        rows = np.sort(np.random.default_rng(seed).choice(len(Z), max_rows, replace=False))
+
+    indices, _ = neighbor_index(Z[rows], Z, max(k_values), exclude=rows)
+    predictions = vote_all_k(y[indices], k_values)
+    accuracies = (predictions == y[rows][None, :]).mean(axis=1)
+
+    best = int(np.argmax(accuracies))
+    return {
+        'best_k': k_values[best],
+        'best_accuracy': float(accuracies[best]),
+        'all_k_results': {str(k): float(acc) for k, acc in zip(k_values, accuracies)},
+        'method': 'leave-one-out',
+        'rows': len(rows),
+    }
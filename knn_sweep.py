@@ -0,0 +1,156 @@
+import argparse
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from itertools import product
+
+import numpy as np
+import pandas as pd
+
+from dashboard_model import load_tables
+from data_store import DATA_PATH
+from knn_engine import FEATURE_COLUMNS, K_VALUES, LABEL_COL, N_CLASSES, pairwise_sq_dist, vote_all_k
+
+METRICS = ('euclidean', 'manhattan', 'cosine')
+SCALINGS = ('standard', 'minmax', 'none')
+N_SPLITS = 5
+N_REPEATS = 10
+# Larger tables are swept on a fixed stratified sample of this many rows
+MAX_ROWS = 2000
+
+
+@dataclass(frozen=True)
+class SweepResult:
+    # One row per (metric, scaling, k): Mean and Std of the accuracy over every
+    # fold of every repeat, best configuration first
+    results: pd.DataFrame
+    n_splits: int
+    n_repeats: int
+    rows: int
+
+    @property
+    def best(self):
+        return self.results.iloc[0]
+
+
+def stratified_folds(y, n_splits=N_SPLITS, n_repeats=N_REPEATS, seed=0):
+    # Fold number of every row for each repeat, shape (n_repeats, n). Each
+    # class is shuffled and dealt round-robin, so every fold gets its share.
+    rng = np.random.default_rng(seed)
+    folds = np.empty((n_repeats, len(y)), dtype=np.intp)
+    for r in range(n_repeats):
+        offset = 0
+        for label in np.unique(y):
+            rows = rng.permutation(np.flatnonzero(y == label))
+            folds[r, rows] = (np.arange(len(rows)) + offset) % n_splits
+            offset += len(rows)
+    return folds
+
+
+def scale(train, test, scaling):
+    # Fitted on the training fold only, so nothing leaks from the test rows
+    if scaling == 'standard':
+        center, spread = train.mean(axis=0), train.std(axis=0)
+    elif scaling == 'minmax':
+        center, spread = train.min(axis=0), train.max(axis=0) - train.min(axis=0)
+    else:
+        return train, test
+    spread = np.where(spread == 0, 1.0, spread)
+    return (train - center) / spread, (test - center) / spread
+
+
+def distances(Q, X, metric):
+    if metric == 'euclidean':
+        return pairwise_sq_dist(Q, X)
+    if metric == 'cosine':
+        Qn = Q / np.maximum(np.linalg.norm(Q, axis=1, keepdims=True), 1e-12)
+        Xn = X / np.maximum(np.linalg.norm(X, axis=1, keepdims=True), 1e-12)
+        return 1.0 - Qn @ Xn.T
+    # Manhattan, one feature at a time so no (q, n, features) block is built
+    d = np.zeros((len(Q), len(X)))
+    for f in range(Q.shape[1]):
+        d += np.abs(Q[:, f, None] - X[None, :, f])
+    return d
+
+
+def sweep_config(X, y, folds, metric, scaling, k_values):
+    # Accuracy of every k on every (repeat, fold) for one metric and scaling:
+    # one distance matrix and one neighbour sort per fold serve all k at once
+    kmax = max(k_values)
+    scores = []
+    for repeat in folds:
+        for fold in range(repeat.max() + 1):
+            test = repeat == fold
+            train_X, test_X = scale(X[~test], X[test], scaling)
+            d = distances(test_X, train_X, metric)
+            kfold = min(kmax, d.shape[1])
+            part = np.argpartition(d, kfold - 1, axis=1)[:, :kfold]
+            order = np.argsort(np.take_along_axis(d, part, axis=1), axis=1, kind='stable')
+            neighbors = np.take_along_axis(part, order, axis=1)
+            ks = [min(k, kfold) for k in k_values]
+            predictions = vote_all_k(y[~test][neighbors], ks, N_CLASSES)
+            scores.append((predictions == y[test][None, :]).mean(axis=1))
+    return metric, scaling, np.array(scores)
+
+
+def _sample(y, max_rows, seed):
+    # Stratified subsample: each class keeps its share of the rows
+    rng = np.random.default_rng(seed)
+    keep = []
+    for label in np.unique(y):
+        rows = np.flatnonzero(y == label)
+        keep.append(rng.choice(rows, max(1, round(len(rows) * max_rows / len(y))), replace=False))
+    return np.sort(np.concatenate(keep))
+
+
+def sweep(df, k_values=K_VALUES, metrics=METRICS, scalings=SCALINGS, n_splits=N_SPLITS,
+          n_repeats=N_REPEATS, columns=FEATURE_COLUMNS, workers=None, seed=0):
+    # Repeated stratified k-fold over every (metric, scaling, k). Each
+    # (metric, scaling) pair is one job in a thread pool; workers=1 runs them
+    # inline. The jobs are NumPy products and sorts, which release the GIL,
+    # and unlike worker processes threads never re-import the calling script
+    # (the Streamlit page has no __main__ guard).
+    X = df[columns].to_numpy(dtype=float)
+    y = df[LABEL_COL].to_numpy(dtype=int)
+    if len(X) > MAX_ROWS:
+        rows = _sample(y, MAX_ROWS, seed)
+        X, y = X[rows], y[rows]
+    folds = stratified_folds(y, n_splits, n_repeats, seed)
+    # The smallest training fold bounds k
+    k_values = [k for k in k_values if k < len(X) - np.bincount(folds[0]).max()]
+
+    configs = list(product(metrics, scalings))
+    if workers == 1:
+        outcomes = [sweep_config(X, y, folds, m, s, k_values) for m, s in configs]
+    else:
+        with ThreadPoolExecutor(max_workers=workers or min(len(configs), os.cpu_count() or 1)) as pool:
+            outcomes = list(pool.map(sweep_config, *zip(*[(X, y, folds, m, s, k_values) for m, s in configs])))
+
+    records = []
+    for metric, scaling, scores in outcomes:
+        for i, k in enumerate(k_values):
+            records.append({'metric': metric, 'scaling': scaling, 'k': k,
+                            'Mean': scores[:, i].mean(), 'Std': scores[:, i].std()})
+    results = (pd.DataFrame(records)
+               .sort_values(['Mean', 'Std', 'k'], ascending=[False, True, True], kind='stable')
+               .reset_index(drop=True))
+    return SweepResult(results=results, n_splits=n_splits, n_repeats=n_repeats, rows=len(X))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Cross-validated KNN sweep over k, metric and scaling.')
+    parser.add_argument('path', nargs='?', default=DATA_PATH, help='source JSON file')
+    parser.add_argument('--workers', type=int, default=None, help='worker threads (default: one per config)')
+    parser.add_argument('--top', type=int, default=10, help='configurations to print')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    result = sweep(load_tables(args.path)[0], workers=args.workers)
+    print(f'{len(result.results)} configurations, {result.n_repeats}x{result.n_splits}-fold on {result.rows} rows '
+          f'in {time.perf_counter() - start:.2f}s')
+    print(result.results.head(args.top).to_string(index=False, float_format=lambda v: f'{v * 100:.1f}'))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+import numpy as np
+
+from knn_engine import FEATURE_COLUMNS, feature_matrix
+
+# Leaves are scanned with one matrix-vector product each, so mid-sized leaves
+# trade a few more distance evaluations for far fewer Python-level steps
+LEAF_SIZE = 512
+MAX_SIMILAR = 10
+
+
+class KDTree:
+    # KD-tree over the standardized KNN feature vectors. Built once per data
+    # version with median splits on the widest dimension; only the leaves are
+    # kept, each a contiguous block of the reordered rows with its bounding
+    # box. A query ranks every leaf by box distance in one vectorized step and
+    # scans them nearest first until the next box is farther than the current
+    # k-th neighbour. Distances come from precomputed squared norms,
+    # |x|^2 - 2 x.q + |q|^2, so a leaf costs one matrix-vector product.
+
+    def __init__(self, X, leaf_size=LEAF_SIZE):
+        X = np.asarray(X, dtype=float)
+        order = np.arange(len(X))
+        leaves = []
+        stack = [(0, len(X))]
+        while stack:
+            start, stop = stack.pop()
+            points = X[order[start:stop]]
+            if stop - start <= leaf_size:
+                leaves.append((start, stop))
+                continue
+            dim = int(np.argmax(points.max(axis=0) - points.min(axis=0)))
+            mid = (start + stop) // 2
+            part = np.argpartition(points[:, dim], mid - start)
+            order[start:stop] = order[start:stop][part]
+            stack.append((mid, stop))
+            stack.append((start, mid))
+        leaves.sort()
+
+        self.order = order
+        # Position of every original row in the reordered block
+        self.rank = np.empty_like(order)
+        self.rank[order] = np.arange(len(order))
+        self.X = np.ascontiguousarray(X[order])
+        self.norms = np.einsum('ij,ij->i', self.X, self.X)
+        self.starts = np.array([start for start, _ in leaves])
+        self.stops = np.array([stop for _, stop in leaves])
+        self.lows = np.array([self.X[start:stop].min(axis=0) for start, stop in leaves])
+        self.highs = np.array([self.X[start:stop].max(axis=0) for start, stop in leaves])
+
+    def point(self, row):
+        return self.X[self.rank[row]]
+
+    def query(self, q, k, exclude=None):
+        # (indices, distances) of the k nearest rows to q, nearest first.
+        # exclude drops one row index (the query's own row).
+        q = np.asarray(q, dtype=float)
+        gap = np.maximum(self.lows - q, 0.0) + np.maximum(q - self.highs, 0.0)
+        bounds = np.einsum('ij,ij->i', gap, gap)
+        skip = -1 if exclude is None else self.rank[exclude]
+        qq = q @ q
+
+        best_pos = np.empty(0, dtype=np.intp)
+        best_d = np.empty(0)
+        kth = np.inf
+        for leaf in np.argsort(bounds, kind='stable'):
+            if bounds[leaf] >= kth:
+                break
+            start, stop = self.starts[leaf], self.stops[leaf]
+            d = self.norms[start:stop] - 2.0 * (self.X[start:stop] @ q) + qq
+            if start <= skip < stop:
+                d[skip - start] = np.inf
+            best_pos = np.concatenate([best_pos, np.arange(start, stop)])
+            best_d = np.concatenate([best_d, d])
+            if len(best_d) > k:
+                keep = np.argpartition(best_d, k - 1)[:k]
+                best_pos, best_d = best_pos[keep], best_d[keep]
+            if len(best_d) == k:
+                kth = best_d.max()
+
+        order = np.argsort(best_d, kind='stable')
+        best_pos, best_d = best_pos[order], best_d[order]
+        finite = np.isfinite(best_d)
+        # The expanded form can dip just below zero for coincident points
+        return self.order[best_pos[finite]], np.sqrt(np.maximum(best_d[finite], 0.0))
+
+
+class NeighborIndex:
+    # "Provinces like this one": a KD-tree over the same standardized feature
+    # space the KNN classifier votes in, addressed by province name
+
+    def __init__(self, df, columns=FEATURE_COLUMNS):
+        self.names = df['Provinsi'].to_numpy()
+        self.tree = KDTree(feature_matrix(df, columns))
+        # A name that repeats (synthetic or district-level data) resolves to its
+        # first row
+        self._rows = {}
+        for i, name in enumerate(self.names):
+            self._rows.setdefault(name, i)
+
+    def choices(self):
+        return list(self._rows)
+
+    def row(self, name):
+        return self._rows[name]
+
+    def similar(self, name, k=5):
+        # (row indices, distances) of the k rows nearest to name, excluding itself
+        row = self._rows[name]
+        return self.tree.query(self.tree.point(row), min(k, len(self.names) - 1), exclude=row)
+
+
+def build_index(df, columns=FEATURE_COLUMNS):
+    return NeighborIndex(df, columns)
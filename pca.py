@@ -0,0 +1,50 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from knn_engine import FEATURE_COLUMNS, LABEL_COL, feature_matrix
+
+
+@dataclass(frozen=True)
+class PCAResult:
+    coords: pd.DataFrame
+    components: np.ndarray
+    explained_variance_ratio: tuple
+
+
+def _svd_flip(U, Vt):
+    # Make the largest loading of every component positive so the projection
+    # does not flip sign between data versions
+    signs = np.sign(Vt[np.arange(len(Vt)), np.abs(Vt).argmax(axis=1)])
+    signs[signs == 0] = 1.0
+    return U * signs, Vt * signs[:, None]
+
+
+def svd(Z, n_components):
+    # Exact thin SVD. With only a handful of feature columns it costs about
+    # 10 ms at 50,000 rows; a randomized sketch would be full rank here and
+    # only slower.
+    U, S, Vt = np.linalg.svd(Z, full_matrices=False)
+    return U[:, :n_components], S[:n_components], Vt[:n_components]
+
+
+def project(df, n_components=2, columns=FEATURE_COLUMNS):
+    Z = feature_matrix(df, columns)
+    U, S, Vt = svd(Z, n_components)
+    U, Vt = _svd_flip(U, Vt)
+
+    total_var = (Z * Z).sum()
+    coords = pd.DataFrame(U * S, columns=[f'PC{i + 1}' for i in range(n_components)])
+    # Same layout as the pca_data section the pipeline used to ship
+    coords['Provinsi'] = df['Provinsi'].to_numpy()
+    coords['TGM_Score'] = df['Tingkat Kegemaran Membaca'].to_numpy()
+    coords['Kelas'] = df['Kategori'].to_numpy()
+    coords['Kelas_Num'] = df[LABEL_COL].to_numpy()
+
+    ratio = S ** 2 / total_var if total_var else np.zeros_like(S)
+    return PCAResult(
+        coords=coords,
+        components=Vt,
+        explained_variance_ratio=tuple(float(r) for r in ratio)
+    )
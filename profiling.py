@@ -0,0 +1,123 @@
+import json
+import os
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+PROFILE_ENV = 'DASHBOARD_PROFILE'
+PROFILE_LOG_ENV = 'DASHBOARD_PROFILE_LOG'
+PROFILE_PARAM = 'profile'
+
+STAGES = ['load', 'aggregate', 'figure', 'serialize']
+
+_TRUTHY = {'1', 'true', 'yes', 'on'}
+
+
+def profiling_requested(query_params=None):
+    # Opt in with ?profile=1 on the URL or DASHBOARD_PROFILE=1 in the environment
+    if os.environ.get(PROFILE_ENV, '').lower() in _TRUTHY:
+        return True
+    if query_params is not None:
+        return str(query_params.get(PROFILE_PARAM, '')).lower() in _TRUTHY
+    return False
+
+
+class Profiler:
+    # Accumulates wall time per (section, stage) for one script run. When
+    # disabled every context manager is a no-op, so the hooks can stay in the
+    # page permanently.
+
+    def __init__(self, enabled=False, log=None):
+        self.enabled = enabled
+        # JSONL file every finished run is appended to
+        self.log = log
+        self.started = time.time()
+        self.totals = defaultdict(float)
+        self.counts = defaultdict(int)
+        self._sections = ['page']
+        self._extra = {}
+        self._page_running = True
+
+    @contextmanager
+    def _section(self, name):
+        self._sections.append(name)
+        try:
+            yield
+        finally:
+            self._sections.pop()
+
+    @contextmanager
+    def _stage(self, stage):
+        key = (self._sections[-1], stage)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.totals[key] += time.perf_counter() - start
+            self.counts[key] += 1
+
+    @contextmanager
+    def _run(self, name):
+        if self._page_running:
+            with self._section(name):
+                yield False
+            return
+        # A fragment-only rerun skips the rest of the script, finish()
+        # included, so it is timed from scratch and dumped as its own record
+        self.started = time.time()
+        self.totals.clear()
+        self.counts.clear()
+        self._page_running = True
+        try:
+            with self._section(name):
+                yield True
+        finally:
+            self._page_running = False
+            if self.log:
+                self.dump_jsonl(self.log, fragment=name, **self._extra)
+
+    def section(self, name):
+        return self._section(name) if self.enabled else nullcontext()
+
+    def run(self, name):
+        # Wraps an st.fragment body: a section of the page run, or a run of its
+        # own when the fragment reruns alone. Yields True in the latter case.
+        return self._run(name) if self.enabled else nullcontext(False)
+
+    def finish(self, **extra):
+        # End of the script run; extra tags this record and later fragment ones
+        self._page_running = False
+        self._extra = extra
+        if self.enabled and self.log:
+            self.dump_jsonl(self.log, **extra)
+
+    def stage(self, stage):
+        return self._stage(stage) if self.enabled else nullcontext()
+
+    def summary(self):
+        # Milliseconds per section (rows) and stage (columns)
+        rows = defaultdict(dict)
+        for (section, stage), seconds in self.totals.items():
+            rows[section][stage] = seconds * 1000
+        table = pd.DataFrame.from_dict(rows, orient='index')
+        table = table.reindex(columns=[s for s in STAGES if s in table.columns]).fillna(0.0)
+        table['total'] = table.sum(axis=1)
+        return table.round(2)
+
+    def records(self):
+        return [
+            {'section': section, 'stage': stage, 'ms': round(seconds * 1000, 3),
+             'calls': self.counts[(section, stage)]}
+            for (section, stage), seconds in self.totals.items()
+        ]
+
+    def dump_jsonl(self, path, **extra):
+        line = dict(ts=self.started, **extra, records=self.records())
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(line) + '\n')
+
+
+def log_path():
+    return os.environ.get(PROFILE_LOG_ENV)
@@ -0,0 +1,226 @@
+import argparse
+import difflib
+import sys
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from dashboard_model import APS_COLUMNS, TGM_COL
+from data_store import DATA_PATH, load_sections
+from knn_engine import FEATURE_COLUMNS, LABEL_COL, LABEL_MAP
+
+# statistics may be rounded by the pipeline; averages and bounds agree with the
+# provinces table to within this many TGM points
+STATS_TOLERANCE = 0.01
+# Problems listed per section before the rest are summarized
+MAX_PROBLEMS = 5
+
+
+@dataclass(frozen=True)
+class Column:
+    # kind is 'str', 'int' or 'float' ('int' accepts integral floats, so CSV
+    # and HTTP sources may deliver 3.0); values outside [low, high] or in
+    # choices' complement are rejected, nulls always are
+    kind: str
+    low: float = -np.inf
+    high: float = np.inf
+    choices: tuple = None
+
+
+@dataclass(frozen=True)
+class Field:
+    # One key of a dict section
+    kind: type
+    low: float = -np.inf
+    high: float = np.inf
+
+
+PERCENT = Column('float', 0, 100)
+
+TABLE_SCHEMAS = {
+    'provinces': {
+        'Provinsi': Column('str'),
+        TGM_COL: PERCENT,
+        LABEL_COL: Column('int', 0, max(LABEL_MAP)),
+        **{column: Column('float', 0) for column in FEATURE_COLUMNS if column not in APS_COLUMNS},
+        **{column: PERCENT for column in APS_COLUMNS},
+    },
+    'pca_data': {
+        'PC1': Column('float'),
+        'PC2': Column('float'),
+        'Provinsi': Column('str'),
+        'TGM_Score': PERCENT,
+        'Kelas': Column('str', choices=tuple(LABEL_MAP.values())),
+        'Kelas_Num': Column('int', 0, max(LABEL_MAP)),
+    },
+    'history': {
+        'Provinsi': Column('str'),
+        'Tahun': Column('int', 1900, 2100),
+        TGM_COL: PERCENT,
+    },
+}
+
+META_SCHEMAS = {
+    'statistics': {
+        'total_provinces': Field(int, 1),
+        'avg_tgm': Field(float, 0, 100),
+        'min_tgm': Field(float, 0, 100),
+        'max_tgm': Field(float, 0, 100),
+        'class_distribution': Field(dict),
+    },
+    'knn_evaluation': {
+        'best_k': Field(int, 1),
+        'best_accuracy': Field(float, 0, 1),
+        'all_k_results': Field(dict),
+    },
+}
+
+# The app cannot render without these; the others are checked when present
+REQUIRED_SECTIONS = ('provinces',)
+
+
+def _missing(name, found):
+    # 'Durasi Membaca1' renamed to 'Durasi Membaca 1' should say so
+    close = difflib.get_close_matches(name, [str(c) for c in found], n=1)
+    return f'missing column {name!r}' + (f' (found {close[0]!r})' if close else '')
+
+
+def _kind_ok(kind, series):
+    if kind == 'str':
+        return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+    return pd.api.types.is_numeric_dtype(series) and not pd.api.types.is_bool_dtype(series)
+
+
+def check_table(frame, schema):
+    # Column presence and dtypes from the frame's metadata, then one vectorized
+    # pass over every numeric column: nulls, ranges and integrality are
+    # computed for the whole (rows, columns) block at once
+    problems = []
+    numeric = []
+    for name, column in schema.items():
+        if name not in frame.columns:
+            problems.append(_missing(name, frame.columns))
+        elif not _kind_ok(column.kind, frame[name]):
+            problems.append(f'column {name!r} should be {column.kind}, got {frame[name].dtype}')
+        elif column.kind == 'str':
+            bad = frame[name].isna()
+            if column.choices is not None:
+                bad |= ~frame[name].isin(column.choices)
+            if bad.any():
+                expected = f'one of {list(column.choices)}' if column.choices is not None else 'non-empty'
+                problems.append(f'column {name!r} should be {expected}; {int(bad.sum())} rows are not, '
+                                f'e.g. {frame[name][bad].iloc[0]!r}')
+        else:
+            numeric.append(name)
+
+    if numeric:
+        columns = [schema[name] for name in numeric]
+        values = frame[numeric].to_numpy(dtype=float)
+        low = np.array([c.low for c in columns])
+        high = np.array([c.high for c in columns])
+        integral = np.array([c.kind == 'int' for c in columns])
+        nulls = np.isnan(values)
+        out_of_range = (values < low) | (values > high)
+        fractional = integral & ~nulls & (values != np.round(values))
+        for i in np.flatnonzero(nulls.any(axis=0) | out_of_range.any(axis=0) | fractional.any(axis=0)):
+            name, column = numeric[i], columns[i]
+            if nulls[:, i].any():
+                problems.append(f'column {name!r} has {int(nulls[:, i].sum())} missing values')
+            if out_of_range[:, i].any():
+                bad = values[out_of_range[:, i], i]
+                problems.append(f'column {name!r} should be within [{column.low:g}, {column.high:g}]; '
+                                f'{len(bad)} rows are not, e.g. {bad[0]:g}')
+            if fractional[:, i].any():
+                problems.append(f'column {name!r} should be whole numbers; '
+                                f'{int(fractional[:, i].sum())} rows are not')
+    return problems
+
+
+def check_meta(value, schema):
+    if not isinstance(value, dict):
+        return [f'should be an object, got {type(value).__name__}']
+    problems = []
+    for key, field in schema.items():
+        if key not in value:
+            problems.append(f'missing key {key!r}')
+            continue
+        item = value[key]
+        # JSON has one number type: 3.0 is a valid int, 1 a valid float
+        if field.kind is int:
+            ok = isinstance(item, (int, float)) and not isinstance(item, bool) and float(item).is_integer()
+        elif field.kind is float:
+            ok = isinstance(item, (int, float)) and not isinstance(item, bool)
+        else:
+            ok = isinstance(item, field.kind)
+        if not ok:
+            problems.append(f'{key!r} should be {field.kind.__name__}, got {item!r}')
+        elif field.kind in (int, float) and not field.low <= item <= field.high:
+            problems.append(f'{key!r} should be within [{field.low:g}, {field.high:g}], got {item!r}')
+    return problems
+
+
+def check_statistics(statistics, provinces):
+    # The stored summary must describe the provinces table it ships with
+    problems = []
+    tgm = provinces[TGM_COL]
+    expected = {
+        'total_provinces': len(provinces),
+        'avg_tgm': tgm.mean(),
+        'min_tgm': tgm.min(),
+        'max_tgm': tgm.max(),
+    }
+    for key, value in expected.items():
+        stored = statistics[key]
+        if not np.isclose(stored, value, rtol=0, atol=STATS_TOLERANCE if key != 'total_provinces' else 0):
+            problems.append(f'{key!r} is {stored!r} but provinces give {value:g}')
+
+    counts = provinces[LABEL_COL].map(LABEL_MAP).value_counts().to_dict()
+    stored = {label: count for label, count in statistics['class_distribution'].items() if count}
+    if stored != counts:
+        problems.append(f"'class_distribution' is {statistics['class_distribution']} but provinces give {counts}")
+    return problems
+
+
+def validate(sections):
+    # Every problem in the data sections as '<section>: <problem>' lines; an
+    # empty tuple means the data is safe to render
+    problems = {}
+    for section in REQUIRED_SECTIONS:
+        if section not in sections:
+            problems[section] = ['section is missing']
+
+    for section, schema in TABLE_SCHEMAS.items():
+        if section in sections:
+            problems[section] = check_table(sections[section], schema)
+    for section, schema in META_SCHEMAS.items():
+        if section in sections:
+            problems[section] = check_meta(sections[section], schema)
+
+    # The cross-check needs both sides intact
+    if ('statistics' in sections and not problems['statistics']
+            and 'provinces' in sections and not problems['provinces']):
+        problems['statistics'] = check_statistics(sections['statistics'], sections['provinces'])
+
+    lines = []
+    for section, found in problems.items():
+        lines.extend(f'{section}: {problem}' for problem in found[:MAX_PROBLEMS])
+        if len(found) > MAX_PROBLEMS:
+            lines.append(f'{section}: ... and {len(found) - MAX_PROBLEMS} more')
+    return tuple(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check a dashboard data file against the schema.')
+    parser.add_argument('path', nargs='?', default=DATA_PATH, help='source JSON file')
+    args = parser.parse_args()
+
+    problems = validate(load_sections(args.path))
+    for problem in problems:
+        print(problem)
+    print(f'{args.path}: {len(problems)} problems' if problems else f'{args.path}: ok')
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,303 @@
+import argparse
+import asyncio
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import MappingProxyType
+from urllib.parse import parse_qs
+
+import pandas as pd
+
+from data_store import DATA_PATH, META_SECTIONS, SECTIONS, load_sections, resolve_path
+
+# DASHBOARD_SOURCES routes sections to sources, e.g.
+#   *=dashboard_data.json,provinces=sqlite://pipeline.db,history=csv://drops
+# Sections without a route come from the '*' source (DATA_PATH by default).
+SOURCES_ENV = 'DASHBOARD_SOURCES'
+SOURCES_TTL_ENV = 'DASHBOARD_SOURCES_TTL'
+# Seconds one source may take before the last good copy of its sections is
+# served instead (per source with ?timeout=)
+DEFAULT_TIMEOUT = 5.0
+# Seconds fetched sections count as fresh; the first poll after that serves
+# them as they are and refreshes every source in the background
+DEFAULT_TTL = 30.0
+REQUIRED_SECTIONS = ('provinces',)
+SQLITE_META_TABLE = 'dashboard_meta'
+
+
+class Source:
+    # A place some sections are fetched from. fetch() is blocking and runs in a
+    # worker thread; it returns the sections it has and leaves out the rest.
+
+    def __init__(self, location, timeout=DEFAULT_TIMEOUT):
+        self.location = location
+        self.timeout = timeout
+
+    @property
+    def name(self):
+        return f'{type(self).__name__}({self.location})'
+
+    def __repr__(self):
+        return self.name
+
+    def fetch(self, sections):
+        raise NotImplementedError
+
+
+class JsonSource(Source):
+    # The dashboard JSON file, or its columnar Arrow files when they are current
+
+    def fetch(self, sections):
+        data = load_sections(self.location)
+        return {section: data[section] for section in sections if section in data}
+
+
+class SqliteSource(Source):
+    # One table per tabular section; dict sections are JSON text in the
+    # dashboard_meta (section, value) table
+
+    def fetch(self, sections):
+        uri = f'file:{resolve_path(self.location)}?mode=ro'
+        with sqlite3.connect(uri, uri=True, timeout=self.timeout) as conn:
+            tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+            found = {}
+            for section in sections:
+                if section in META_SECTIONS:
+                    if SQLITE_META_TABLE not in tables:
+                        continue
+                    row = conn.execute(f'SELECT value FROM {SQLITE_META_TABLE} WHERE section = ?',
+                                       (section,)).fetchone()
+                    if row is not None:
+                        found[section] = json.loads(row[0])
+                elif section in tables:
+                    found[section] = pd.read_sql_query(f'SELECT * FROM "{section}"', conn)
+        return found
+
+
+class CsvSource(Source):
+    # A drop directory with <section>.csv per table and <section>.json per
+    # dict section
+
+    def fetch(self, sections):
+        directory = resolve_path(self.location)
+        found = {}
+        for section in sections:
+            if section in META_SECTIONS:
+                path = os.path.join(directory, f'{section}.json')
+                if os.path.exists(path):
+                    with open(path, encoding='utf-8') as f:
+                        found[section] = json.load(f)
+            else:
+                path = os.path.join(directory, f'{section}.csv')
+                if os.path.exists(path):
+                    found[section] = pd.read_csv(path)
+        return found
+
+
+class HttpSource(Source):
+    # GET <url>/<section>.json: a list of records per table, an object per dict
+    # section; 404 means the endpoint does not serve that section
+
+    def fetch(self, sections):
+        found = {}
+        for section in sections:
+            try:
+                with urllib.request.urlopen(f"{self.location.rstrip('/')}/{section}.json",
+                                            timeout=self.timeout) as response:
+                    payload = json.load(response)
+            except urllib.error.HTTPError as exc:
+                if exc.code == 404:
+                    continue
+                raise
+            found[section] = payload if section in META_SECTIONS else pd.DataFrame(payload)
+        return found
+
+
+SCHEMES = {'json': JsonSource, 'sqlite': SqliteSource, 'csv': CsvSource, 'http': HttpSource, 'https': HttpSource}
+
+
+def parse_source(uri):
+    # sqlite://path, csv://dir, http(s)://host/path or a JSON file path, with an
+    # optional ?timeout=seconds
+    location, _, query = uri.partition('?')
+    timeout = float(parse_qs(query).get('timeout', [DEFAULT_TIMEOUT])[0])
+    scheme, sep, rest = location.partition('://')
+    if not sep:
+        return JsonSource(location, timeout)
+    if scheme not in SCHEMES:
+        raise ValueError(f'unknown data source scheme {scheme!r} in {uri!r}; expected one of {sorted(SCHEMES)}')
+    return SCHEMES[scheme](location if scheme in ('http', 'https') else rest, timeout)
+
+
+def parse_routes(spec, default=DATA_PATH):
+    # 'section=uri,...' -> {source: (sections, ...)}; one Source per distinct uri
+    uris = {'*': default}
+    for entry in filter(None, (part.strip() for part in spec.split(','))):
+        section, sep, uri = entry.partition('=')
+        if not sep or (section != '*' and section not in SECTIONS):
+            raise ValueError(f'bad {SOURCES_ENV} entry {entry!r}; expected <section>=<uri> '
+                             f"with section '*' or one of {list(SECTIONS)}")
+        uris[section] = uri
+    by_uri = {}
+    for section in SECTIONS:
+        by_uri.setdefault(uris.get(section, uris['*']), []).append(section)
+    return {parse_source(uri): tuple(sections) for uri, sections in by_uri.items()}
+
+
+def section_version(value):
+    if isinstance(value, pd.DataFrame):
+        h = hashlib.sha256(json.dumps(list(map(str, value.columns))).encode())
+        h.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+        return h.hexdigest()
+    return hashlib.sha256(json.dumps(value, sort_keys=True).encode()).hexdigest()
+
+
+class SourceSet:
+    # Every configured source fetched concurrently on a private asyncio loop,
+    # each bounded by its own timeout, behind a stale-while-revalidate cache.
+    # Stands in for DataWatcher: poll() returns (data_hash, versions, changed)
+    # without waiting once a first snapshot exists, and load(data_hash) returns
+    # the sections of that snapshot. A source that fails or times out keeps
+    # serving the sections it delivered last.
+
+    def __init__(self, routes, ttl=DEFAULT_TTL):
+        self.routes = routes
+        self.ttl = ttl
+        self.errors = {}
+        self.timings = {}
+        self.data_hash = None
+        self.versions = MappingProxyType({})
+        self._entries = {}
+        self._snapshots = {}
+        self._latest = None
+        self._fetched = None
+        self._refresh = None
+        self._lock = threading.Lock()
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(target=self._loop.run_forever, name='dashboard-sources', daemon=True).start()
+
+    async def _fetch(self, source, sections):
+        start = time.perf_counter()
+        try:
+            found = await asyncio.wait_for(asyncio.to_thread(source.fetch, sections), source.timeout)
+        except Exception as exc:
+            # The worker thread of a timed-out fetch finishes on its own; its
+            # result is dropped
+            self.errors[source] = f'{type(exc).__name__}: {exc}' if str(exc) else type(exc).__name__
+            found = {}
+        else:
+            self.errors.pop(source, None)
+        self.timings[source] = time.perf_counter() - start
+        return found
+
+    async def _revalidate(self):
+        results = await asyncio.gather(*(self._fetch(source, sections) for source, sections in self.routes.items()))
+        with self._lock:
+            for found in results:
+                for section, value in found.items():
+                    self._entries[section] = (value, section_version(value))
+            self._fetched = time.monotonic()
+            versions = {section: version for section, (_, version) in self._entries.items()}
+            data_hash = hashlib.sha256(json.dumps(versions, sort_keys=True).encode()).hexdigest()
+            self._snapshots[data_hash] = {section: value for section, (value, _) in self._entries.items()}
+            # Keep the previous snapshot for sessions still rendering it
+            for stale in list(self._snapshots)[:-2]:
+                del self._snapshots[stale]
+            self._latest = (data_hash, MappingProxyType(versions))
+
+    def _start_refresh(self):
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.run_coroutine_threadsafe(self._revalidate(), self._loop)
+        return self._refresh
+
+    def poll(self):
+        with self._lock:
+            first = self._fetched is None
+            if first or time.monotonic() - self._fetched >= self.ttl:
+                refresh = self._start_refresh()
+        # Only the very first poll waits, and at most as long as the slowest
+        # source's timeout
+        if first:
+            refresh.result()
+
+        with self._lock:
+            missing = [section for section in REQUIRED_SECTIONS if section not in self._entries]
+            if missing:
+                self._fetched = None
+                raise RuntimeError(f'no data source delivered {missing}: {self.errors or "not configured"}')
+            data_hash, versions = self._latest
+            if data_hash == self.data_hash:
+                return self.data_hash, self.versions, frozenset()
+            changed = frozenset(k for k in SECTIONS if versions.get(k) != self.versions.get(k))
+            self.data_hash, self.versions = data_hash, versions
+            return self.data_hash, self.versions, changed
+
+    def load(self, data_hash=None):
+        # Sections of one snapshot (the latest by default). Frames are shallow
+        # copies, so callers can add columns without touching the cache.
+        with self._lock:
+            snapshot = self._snapshots.get(data_hash) or self._snapshots[self._latest[0]]
+            return {section: value.copy(deep=False) if isinstance(value, pd.DataFrame) else value
+                    for section, value in snapshot.items()}
+
+
+def open_sources(path=DATA_PATH):
+    # None keeps the plain file watcher; DASHBOARD_SOURCES switches to adapters
+    spec = os.environ.get(SOURCES_ENV)
+    if not spec:
+        return None
+    return SourceSet(parse_routes(spec, default=path), ttl=float(os.environ.get(SOURCES_TTL_ENV, DEFAULT_TTL)))
+
+
+def serve(path, port):
+    # Local stand-in for the HTTP endpoint: every section of a JSON data file
+    # at /<section>.json
+    data = {key: value.to_dict(orient='records') if isinstance(value, pd.DataFrame) else value
+            for key, value in load_sections(path).items()}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            section = self.path.strip('/').removesuffix('.json')
+            if section not in data:
+                self.send_error(404)
+                return
+            body = json.dumps(data[section]).encode()
+            self.send_response(200)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    print(f'serving {path} on http://127.0.0.1:{port}/')
+    ThreadingHTTPServer(('127.0.0.1', port), Handler).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fetch the configured data sources once, or stub the HTTP source.')
+    parser.add_argument('spec', nargs='?', default=os.environ.get(SOURCES_ENV, ''),
+                        help=f'section=uri routes (default: {SOURCES_ENV})')
+    parser.add_argument('--serve', type=int, metavar='PORT', help=f'serve {DATA_PATH} over HTTP instead')
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(DATA_PATH, args.serve)
+        return
+
+    sources = SourceSet(parse_routes(args.spec))
+    data_hash, versions, _ = sources.poll()
+    for source, sections in sources.routes.items():
+        status = sources.errors.get(source, 'ok')
+        print(f'{source.name:<50} {sources.timings[source] * 1000:>8.1f} ms  {status}')
+        for section in sections:
+            print(f'    {section:<16} {(versions.get(section) or "-")[:12]}')
+    print(f'data hash {data_hash[:16]}')
+
+
+if __name__ == '__main__':
+    main()
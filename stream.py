@@ -1,11 +1,28 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
 import plotly.graph_objects as go
-from plotly.subplots import make_subplots
+import functools
 import json
 import numpy as np
 
+from artifacts import artifact_root, current_bundle, load_bundle
+from dashboard_model import (APS_COLUMNS, APS_LABELS, CATEGORY_ORDER, DATA_PATH, REGIONS, TGM_COL,
+                             build_model, filter_model, load_history, load_tables, province_stats,
+                             subset_stats)
+from data_store import DataWatcher
+from disk_cache import cached, open_cache
+from filters import FilterSpec, combine_masks, mask_version, term_mask
+from importance import permutation_importance
+from knn_engine import FEATURE_COLUMNS, LABEL_MAP, evaluate as evaluate_knn
+from knn_sweep import sweep as knn_sweep
+from neighbors import MAX_SIMILAR, build_index
+from pca import project as project_pca
+from profiling import Profiler, log_path, profiling_requested
+from schema import validate
+from sources import open_sources
+from whatif import GRID_AXES
+from figures import FigureCache, PayloadBudget, build_similar, build_whatif, compact_json, overlay
+
 # Page config
 st.set_page_config(
     page_title="KNN Literation Analytics Report 2024",
@@ -81,47 +98,232 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 # Load data
-@st.cache_data
-def load_data():
-    with open('dashboard_data.json', 'r', encoding='utf-8') as f:
-        data = json.load(f)
-    
-    df = pd.DataFrame(data['provinces'])
-    df['Kategori'] = df['Label_TGM'].map({0: 'Rendah', 1: 'Sedang', 2: 'Tinggi'})
-    knn_eval = data['knn_evaluation']
-    
-    return df, knn_eval
-
-df, knn_eval = load_data()
-
-# Calculate stats
-total_provinces = len(df)
-tinggi_count = len(df[df['Kategori'] == 'Tinggi'])
-avg_tgm = df['Tingkat Kegemaran Membaca'].mean()
-best_k = knn_eval['best_k']
-best_accuracy = knn_eval['best_accuracy'] * 100
-top_province = df.nlargest(1, 'Tingkat Kegemaran Membaca').iloc[0]
-
-# Calculate correlation
-corr_tgm_aps = df['Tingkat Kegemaran Membaca'].corr(df['APS_19_23'])
-
-# Get regions
-regions = {
-    'Jawa': ['DKI Jakarta', 'Jawa Barat', 'Jawa Tengah', 'DI Yogyakarta', 'Jawa Timur', 'Banten'],
-    'Sumatera': ['Aceh', 'Sumatera Utara', 'Sumatera Barat', 'Riau', 'Jambi', 'Sumatera Selatan', 'Bengkulu', 'Lampung', 'Kepulauan Bangka Belitung', 'Kepulauan Riau'],
-    'Kalimantan': ['Kalimantan Barat', 'Kalimantan Tengah', 'Kalimantan Selatan', 'Kalimantan Timur', 'Kalimantan Utara'],
-    'Sulawesi': ['Sulawesi Utara', 'Sulawesi Tengah', 'Sulawesi Selatan', 'Sulawesi Tenggara', 'Gorontalo', 'Sulawesi Barat']
-}
-
-top_region = None
-top_region_tgm = 0
-for region, provs in regions.items():
-    avg = df[df['Provinsi'].isin(provs)]['Tingkat Kegemaran Membaca'].mean()
-    if avg > top_region_tgm:
-        top_region_tgm = avg
-        top_region = region
-
-categories = df['Kategori'].value_counts()
+# Each cached piece is keyed by the content version of the section it reads, so
+# a rewrite of the data file only invalidates what actually changed. Unchanged
+# data is served from the shared cache on every rerun.
+WATCH_INTERVAL = 10
+
+# DASHBOARD_SOURCES swaps the file watcher for data source adapters (SQLite,
+# CSV drops, HTTP) with the same poll()/load() interface; see sources.py
+@st.cache_resource(show_spinner=False)
+def get_watcher():
+    return open_sources(DATA_PATH) or DataWatcher(DATA_PATH)
+
+# Optional tier below the in-memory caches, shared by every Streamlit process on
+# the host (set DASHBOARD_CACHE_DIR). Keys are section content versions, so a
+# value computed by one process is valid in all of them.
+@st.cache_resource(show_spinner=False)
+def get_disk_cache():
+    return open_cache()
+
+# Schema check of every section in the snapshot, so a broken file stops the
+# page before any panel reads it. Keyed by data hash: warm reruns skip it.
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_validation(data_hash):
+    return cached(get_disk_cache(), ('schema', data_hash),
+                  lambda: validate(get_watcher().load(data_hash)))
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_provinces(version, _data_hash):
+    return cached(get_disk_cache(), ('provinces', version),
+                  lambda: load_tables(sections=get_watcher().load(_data_hash))[0])
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_stats(version, _data_hash):
+    return cached(get_disk_cache(), ('stats', version),
+                  lambda: province_stats(get_provinces(version, _data_hash)))
+
+# KNN metrics are evaluated live from the provinces table (leave-one-out over
+# every k), so they follow the provinces version rather than a stored section
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_knn_eval(version, _data_hash):
+    return cached(get_disk_cache(), ('knn', version),
+                  lambda: evaluate_knn(get_provinces(version, _data_hash)))
+
+# PC1/PC2 are projected from the provinces features instead of read from the
+# pipeline's frozen pca_data section
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_pca(version, _data_hash):
+    return cached(get_disk_cache(), ('pca', version),
+                  lambda: project_pca(get_provinces(version, _data_hash)))
+
+# Permutation importance of the KNN classifier at its best k, recomputed per
+# provinces version
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_importance(version, _data_hash):
+    return cached(get_disk_cache(), ('importance', version),
+                  lambda: permutation_importance(get_provinces(version, _data_hash),
+                                                 get_knn_eval(version, _data_hash)['best_k']))
+
+# KD-tree for the similar-provinces lookup, built once per provinces version
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_neighbors(version, _data_hash):
+    return cached(get_disk_cache(), ('neighbors', version),
+                  lambda: build_index(get_provinces(version, _data_hash)))
+
+# Cross-validated sweep over k, metric and scaling, fanned out to a thread
+# pool. Only run when its section is opened, then cached per provinces version.
+# It sweeps the model's own table, so artifact mode never reads the data file.
+@st.cache_resource(show_spinner='Running the cross-validated KNN sweep...', max_entries=2)
+def get_sweep(version, _df):
+    return cached(get_disk_cache(), ('sweep', version), lambda: knn_sweep(_df))
+
+# The year x province panel depends on the current snapshot and on the
+# optional history section
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_history(version, _data_hash):
+    return cached(get_disk_cache(), ('history', version),
+                  lambda: load_history(sections=get_watcher().load(_data_hash)))
+
+# Assembling the model is cheap; the pieces underneath are reused per section
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_model(data_hash, _versions):
+    df = get_provinces(_versions.get('provinces'), data_hash)
+    stats = get_stats(_versions.get('provinces'), data_hash)
+    knn_eval = get_knn_eval(_versions.get('provinces'), data_hash)
+    pca = get_pca(_versions.get('provinces'), data_hash)
+    importance = get_importance(_versions.get('provinces'), data_hash)
+    neighbors = get_neighbors(_versions.get('provinces'), data_hash)
+    history = get_history((_versions.get('provinces'), _versions.get('history')), data_hash)
+    return build_model(df, knn_eval, pca, history, data_hash=data_hash, versions=_versions, stats=stats,
+                       importance=importance, neighbors=neighbors)
+
+# Filters: every active term's mask is cached per provinces version and the
+# filtered statistics per selected-row set, so moving one slider recomputes one
+# mask and the aggregates downstream of it
+@st.cache_resource(show_spinner=False, max_entries=64)
+def get_term_mask(version, term, _df):
+    mask = term_mask(_df, term)
+    mask.flags.writeable = False
+    return mask
+
+@st.cache_resource(show_spinner=False, max_entries=16)
+def get_subset_stats(version, mask_key, _df, _mask):
+    return cached(get_disk_cache(), ('subset', version, mask_key),
+                  lambda: subset_stats(_df, _mask))
+
+# Serialized figures shared by all sessions; entries are keyed by data hash,
+# so a new data version simply misses and old specs age out of the LRU.
+@st.cache_resource(show_spinner=False)
+def get_figure_cache():
+    return FigureCache(maxsize=64, store=get_disk_cache())
+
+# Artifact mode (DASHBOARD_ARTIFACTS): the model and the default figures come
+# from a bundle written by artifacts.py, so a cold start only unpickles and
+# renders. Bundles are keyed by path, and a new one is picked up when the
+# CURRENT pointer moves.
+ARTIFACT_ROOT = artifact_root()
+
+@st.cache_resource(show_spinner=False, max_entries=2)
+def get_bundle(path):
+    bundle = load_bundle(path)
+    get_figure_cache().preload(bundle.model, bundle.figures)
+    return bundle
+
+def poll_source():
+    if ARTIFACT_ROOT:
+        return current_bundle(ARTIFACT_ROOT)
+    return get_watcher().poll()[0]
+
+def range_filter(label, column, data):
+    # Slider over the column's full range; left at the full range it is inactive
+    low = float(np.floor(data[column].min()))
+    high = float(np.ceil(data[column].max()))
+    value = st.slider(label, low, high, (low, high), step=0.5, key=f'filter_{column}')
+    if value == (low, high):
+        return None
+    return (column, *value)
+
+def filter_sidebar(data):
+    with st.sidebar:
+        st.markdown("<h3>🎛️ Filters</h3>", unsafe_allow_html=True)
+        regions = st.multiselect('Region', list(REGIONS), key='filter_regions')
+        categories = st.multiselect('Kategori', CATEGORY_ORDER, key='filter_categories')
+        aps_column = st.selectbox('APS age group', APS_COLUMNS, index=len(APS_COLUMNS) - 1,
+                                  format_func=dict(zip(APS_COLUMNS, APS_LABELS)).get, key='filter_aps_column')
+        ranges = [range_filter('TGM Score', TGM_COL, data), range_filter('APS (%)', aps_column, data)]
+    return FilterSpec(
+        regions=tuple(regions),
+        categories=tuple(categories),
+        ranges=tuple(r for r in ranges if r is not None)
+    )
+
+profiler = Profiler(enabled=profiling_requested(st.query_params), log=log_path())
+
+with profiler.section('data'):
+    if ARTIFACT_ROOT:
+        with profiler.stage('load'):
+            source = current_bundle(ARTIFACT_ROOT)
+            model = get_bundle(source).model
+            data_hash, versions = model.data_hash, model.versions
+    else:
+        with profiler.stage('load'):
+            data_hash, versions, _ = get_watcher().poll()
+            source = data_hash
+            problems = get_validation(data_hash)
+            if problems:
+                st.error(f'**{DATA_PATH} does not match the dashboard schema.** Fix the data and reload '
+                         'the page.\n\n' + '\n'.join(f'- {problem}' for problem in problems))
+                st.stop()
+            get_provinces(versions.get('provinces'), data_hash)
+        with profiler.stage('aggregate'):
+            model = get_model(data_hash, versions)
+
+    filters = filter_sidebar(model.df)
+    if filters.is_active():
+        with profiler.stage('aggregate'):
+            masks = [get_term_mask(versions.get('provinces'), term, model.df) for term in filters.terms()]
+            mask = combine_masks(masks, len(model.df))
+            if mask.any():
+                key = mask_version(mask)
+                stats = get_subset_stats(versions.get('provinces'), key, model.df, mask)
+                model = filter_model(model, mask, key, stats)
+            else:
+                st.sidebar.warning('No provinces match these filters; showing all provinces.')
+
+df = model.df
+total_provinces = model.total_provinces
+avg_tgm = model.avg_tgm
+best_k = model.best_k
+best_accuracy = model.best_accuracy
+corr_tgm_aps = model.corr_tgm_aps
+top_region = model.top_region
+categories = model.categories
+top_feature = model.importance.importances.iloc[0]
+
+figure_cache = get_figure_cache()
+
+def chart_key(name, **params):
+    return '-'.join([name] + [str(v) for _, v in sorted(params.items())])
+
+# Below-the-fold sections sit in expanders that track their open state. A
+# closed one runs none of its code, so nothing there is built or serialized
+# until the user asks for it and the panels above it render on their own.
+# Stateful expanders need Streamlit 1.55 (pinned in requirements.txt).
+def lazy_section(label, key):
+    return st.expander(label, key=key, on_change='rerun')
+
+# Figure JSON sent to the browser on this run, per chart key. A chart that
+# would take the page over DASHBOARD_PAYLOAD_BUDGET waits behind a button.
+payload = PayloadBudget()
+
+def plot(name, **params):
+    key = chart_key(name, **params)
+    with profiler.stage('figure'):
+        spec = figure_cache.spec(name, model, **params)
+    show(key, spec)
+
+def show(key, spec):
+    forced = st.session_state.setdefault('forced_charts', set())
+    if not payload.admit(key, len(spec), force=key in forced):
+        st.caption(f"Chart held back: {len(spec) / 1024:.0f} KB would take this page over its "
+                   f"{payload.limit / 1024:.0f} KB figure budget.")
+        st.button('Load anyway', key=f'load_{key}', on_click=forced.add, args=(key,))
+        return
+    with profiler.stage('serialize'):
+        # The spec carries its own template, so skip Streamlit's theme pass
+        fig = go.Figure(json.loads(spec), _validate=False)
+        st.plotly_chart(fig, use_container_width=True, theme=None, config={'displayModeBar': False}, key=key)
 
 # ===== HEADER BAR =====
 st.markdown("""
@@ -142,7 +344,7 @@ with col1:
     st.markdown(f"""
     <div class='metric-box'>
         <div style='color: #4dd0e1; font-size: 0.7rem; font-weight: 600;'>🏆 TOP PROVINSI</div>
-        <div style='color: #00d9ff; font-size: 1.3rem; font-weight: 700;'>{top_province['Provinsi'][:15]}</div>
+        <div style='color: #00d9ff; font-size: 1.3rem; font-weight: 700;'>{model.top_province[:15]}</div>
     </div>
     """, unsafe_allow_html=True)
 
@@ -196,219 +398,254 @@ with col7:
 
 st.markdown("<div style='margin: 20px 0;'></div>", unsafe_allow_html=True)
 
-# ===== MAIN CONTENT - 3 COLUMNS (REBALANCED) =====
-col1, col2, col3 = st.columns([1.3, 2, 0.8])
+# ===== PANELS =====
+# Every panel is an st.fragment: a widget inside one (the trend year slider, a
+# lazy section being opened) reruns only that panel's function, not the CSS,
+# the data section and every other figure. Only the sidebar filters, which
+# change the model itself, rerun the whole script.
 
-# ===== LEFT COLUMN (WITH TOGGLE MOVED HERE) =====
-with col1:
+def panel(name):
+    # st.fragment profiled as its own section; a fragment-only rerun never
+    # reaches the overlay at the bottom, so it shows its timings in place
+    def wrap(body):
+        @st.fragment
+        @functools.wraps(body)
+        def run():
+            with profiler.run(name) as alone:
+                body()
+            if alone:
+                timings = profiler.summary()
+                if name in timings.index:
+                    st.caption('⏱️ ' + ', '.join(f'{stage} {ms:.1f} ms' for stage, ms in timings.loc[name].items()))
+        return run
+    return wrap
+
+@panel('trend')
+def trend_panel():
     # TGM Score Trend
     st.markdown("<h3>📈 TGM Score Trend</h3>", unsafe_allow_html=True)
-    
-    top_15 = df.nlargest(15, 'Tingkat Kegemaran Membaca').sort_values('Tingkat Kegemaran Membaca')
-    
-    fig_trend = go.Figure()
-    fig_trend.add_trace(go.Scatter(
-        x=list(range(len(top_15))),
-        y=top_15['Tingkat Kegemaran Membaca'],
-        mode='lines+markers',
-        line=dict(color='#00d9ff', width=3, shape='spline'),
-        marker=dict(size=8, color='#00d9ff', line=dict(width=2, color='#0099cc')),
-        fill='tonexty',
-        fillcolor='rgba(0, 217, 255, 0.1)',
-        text=top_15['Tingkat Kegemaran Membaca'].round(1),
-        textposition='top center',
-        textfont=dict(size=9, color='#00d9ff'),
-        hovertemplate='<b>TGM: %{y:.2f}</b><extra></extra>'
-    ))
-    
-    fig_trend.update_layout(
-        height=240,
-        margin=dict(l=30, r=10, t=10, b=30),
-        paper_bgcolor='rgba(0, 26, 51, 0.5)',
-        plot_bgcolor='rgba(0, 8, 20, 0.8)',
-        xaxis=dict(showgrid=True, gridcolor='rgba(0, 217, 255, 0.1)', showticklabels=False),
-        yaxis=dict(showgrid=True, gridcolor='rgba(0, 217, 255, 0.1)', tickfont=dict(size=10, color='#4dd0e1'), range=[60, 85])
-    )
-    st.plotly_chart(fig_trend, use_container_width=True, config={'displayModeBar': False})
-    
-    st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
-    
+
+    if model.history.is_multi_year():
+        trend_year = st.select_slider('Tahun', options=model.history.years,
+                                      value=model.history.latest_year, key='trend_year')
+        plot('trend', year=trend_year)
+        year_table(trend_year)
+    else:
+        plot('trend')
+
+def year_table(year):
+    # The selected year's leaders with their change since the previous survey
+    # and rolling mean, read from the store's precomputed slice for that year
+    year_slice = model.history.slice(year, model.selected_provinces())
+    top = year_slice.nlargest(5, TGM_COL).reset_index()
+    top.columns = ['Provinsi', 'TGM', 'YoY', 'Rolling']
+    st.dataframe(top.round(2), hide_index=True, use_container_width=True)
+
+@panel('correlation')
+def corr_panel():
     # Feature Correlation Heatmap
     st.markdown("<h3>🔥 Feature Correlation</h3>", unsafe_allow_html=True)
+
+    plot('corr')
+
+@panel('category, regional & pca')
+def left_lazy_panel():
+    with lazy_section('📊 Category, Regional & PCA', 'lazy_left') as section:
+        if section.open:
+            # Distribution (without toggle)
+            st.markdown("<h3>📊 Category Distribution</h3>", unsafe_allow_html=True)
+
+            plot('category')
     
-    corr_features = ['Tingkat Kegemaran Membaca', 'Frekuensi Membaca', 'Jumlah Buku yang Dibaca', 
-                     'APS_19_23', 'APS_16_18', 'Frekuensi Akses Internet']
-    corr_matrix = df[corr_features].corr()
-    short_labels = ['TGM', 'Frek.Baca', 'Jml.Buku', 'APS 19-23', 'APS 16-18', 'Frek.Net']
-    
-    fig_corr = go.Figure(data=go.Heatmap(
-        z=corr_matrix.values,
-        x=short_labels,
-        y=short_labels,
-        colorscale=[[0, '#001a33'], [0.5, '#003366'], [0.75, '#0066cc'], [1, '#00d9ff']],
-        text=np.round(corr_matrix.values, 2),
-        texttemplate='%{text}',
-        textfont=dict(size=10, color='white', weight=700),
-        hovertemplate='<b>%{x} × %{y}</b><br>Correlation: %{z:.3f}<extra></extra>',
-        colorbar=dict(title='Corr', titlefont=dict(color='#4dd0e1', size=10), tickfont=dict(color='#4dd0e1', size=9))
-    ))
-    
-    fig_corr.update_layout(
-        height=250,
-        margin=dict(l=10, r=10, t=10, b=10),
-        paper_bgcolor='rgba(0, 26, 51, 0.5)',
-        plot_bgcolor='rgba(0, 8, 20, 0.8)',
-        xaxis=dict(tickfont=dict(size=9, color='#4dd0e1'), side='bottom'),
-        yaxis=dict(tickfont=dict(size=9, color='#4dd0e1'))
-    )
-    st.plotly_chart(fig_corr, use_container_width=True, config={'displayModeBar': False})
-    
-    st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
-    
-    # Distribution (without toggle)
-    st.markdown("<h3>📊 Category Distribution</h3>", unsafe_allow_html=True)
+            st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
     
-    fig_mini_cat = go.Figure()
-    cat_order = ['Tinggi', 'Sedang', 'Rendah']
-    cat_colors = ['#00d9ff', '#0099cc', '#004d99']
-    cat_values = [categories.get(cat, 0) for cat in cat_order]
+            # Regional Performance (separate chart)
+            st.markdown("<h3>🗺️ Regional Performance</h3>", unsafe_allow_html=True)
+
+            plot('regional')
     
-    fig_mini_cat.add_trace(go.Bar(
-        x=cat_order,
-        y=cat_values,
-        marker=dict(color=cat_colors, line=dict(color='#00d9ff', width=1)),
-        text=cat_values,
-        textposition='outside',
-        textfont=dict(size=17, color='#00d9ff', weight=1000),
-        hovertemplate='<b>%{x}</b><br>Count: %{y}<br>Percentage: ' + 
-                     (pd.Series(cat_values) / sum(cat_values) * 100).round(1).astype(str) + '%<extra></extra>',
-        showlegend=False
-    ))
+            st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
     
-    fig_mini_cat.update_layout(
-        height=300,
-        margin=dict(l=30, r=20, t=10, b=30),
-        paper_bgcolor='rgba(0, 26, 51, 0.5)',
-        plot_bgcolor='rgba(0, 8, 20, 0.8)',
-        xaxis=dict(
-            showgrid=False,
-            tickfont=dict(size=11, color='#4dd0e1', weight=600)
-        ),
-        yaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(0, 217, 255, 0.1)',
-            tickfont=dict(size=10, color='#4dd0e1'),
-            range=[0, max(cat_values) + 5],
-            title=dict(text='Jumlah Provinsi', font=dict(size=10, color='#4dd0e1'))
-        )
+            # PCA projection of the KNN feature space
+            st.markdown("<h3>🧭 PCA Projection</h3>", unsafe_allow_html=True)
+
+            similar_to = st.selectbox('Similar provinces to', ['—', *model.neighbors.choices()], key='similar_to')
+            if similar_to == '—':
+                plot('pca')
+            else:
+                k = st.slider('Neighbours', 1, min(MAX_SIMILAR, len(model.neighbors.names) - 1), 5,
+                              key='similar_k')
+                # The base scatter comes from the shared caches; the overlay
+                # depends on this session's pick, so it is added per run
+                with profiler.stage('figure'):
+                    spec = overlay(figure_cache.spec('pca', model), build_similar(model, similar_to, k))
+                show(chart_key('pca', similar_to=similar_to, k=k), spec)
+                similar_table(similar_to, k)
+
+def sweep_table(result):
+    best = result.best
+    st.caption(f"{result.n_repeats}x repeated stratified {result.n_splits}-fold CV on {result.rows} rows. "
+               f"Best: k={best['k']}, {best['metric']}, {best['scaling']} scaling: "
+               f"{best['Mean'] * 100:.1f}% ± {best['Std'] * 100:.1f}")
+    table = result.results.assign(
+        Accuracy=[f'{m * 100:.1f} ± {s * 100:.1f}' for m, s in zip(result.results['Mean'], result.results['Std'])]
     )
-    st.plotly_chart(fig_mini_cat, use_container_width=True, config={'displayModeBar': False})
+    st.dataframe(table[['k', 'metric', 'scaling', 'Accuracy']], hide_index=True, use_container_width=True, height=250)
+
+def similar_table(name, k):
+    rows, distances = model.neighbors.similar(name, k)
+    table = model.df.iloc[rows][['Provinsi', 'Region', 'Kategori', TGM_COL]].assign(Distance=distances)
+    st.dataframe(table.round(2), hide_index=True, use_container_width=True)
+
+@panel('top 5')
+def top5_panel():
+    # Top 5 Provinces
+    st.markdown("<h3>🏆 Top 5 Provinsi by TGM Score</h3>", unsafe_allow_html=True)
+
+    plot('top5')
+
+@panel('knn')
+def knn_panel():
+    # KNN Accuracy by K Value
+    st.markdown("<h3 style='font-size: 0.9rem;'>🎯 KNN Model Evaluation</h3>", unsafe_allow_html=True)
+
+    plot('knn')
+
+    with lazy_section('📐 Cross-validated sweep', 'lazy_sweep') as section:
+        if section.open:
+            sweep_table(get_sweep(versions.get('provinces'), model.df))
+
+@panel('aps')
+def aps_panel():
+    # APS Decline Trend
+    st.markdown("<h3 style='font-size: 0.9rem;'>📉 APS Decline by Age Group</h3>", unsafe_allow_html=True)
+
+    plot('aps')
+
+@panel('region & importance')
+def region_features_panel():
+    with lazy_section('🗺️ TGM by Region & 📚 Feature Importance', 'lazy_region_features') as section:
+        if section.open:
+            # Bottom 2x2 Grid
+            col2c, col2d = st.columns(2)
+    
+            with col2c:
+                st.markdown("<h3 style='font-size: 0.9rem;'>🗺️ TGM by Region</h3>", unsafe_allow_html=True)
+
+                plot('region_pie')
     
-    st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
+            with col2d:
+                st.markdown("<h3 style='font-size: 0.9rem;'>📚 Feature Importance</h3>", unsafe_allow_html=True)
+
+                plot('feature_importance')
+
+@panel('scatter grid')
+def scatter_panel():
+    with lazy_section('🔬 Correlation Analysis: TGM vs Key Features', 'lazy_scatter') as section:
+        if section.open:
+            # 🆕 NEW: 2x2 Correlation Scatter Plots
+            st.markdown("<h3>🔬 Correlation Analysis: TGM vs Key Features</h3>", unsafe_allow_html=True)
+    
+            col2e, col2f = st.columns(2)
+    
+            with col2e:
+                # Scatter 1: TGM vs Frekuensi Membaca
+                st.markdown("<h3 style='font-size: 0.85rem;'>📖 TGM vs Frekuensi Membaca</h3>", unsafe_allow_html=True)
+
+                plot('scatter', feature='Frekuensi Membaca')
     
-    # Regional Performance (separate chart)
-    st.markdown("<h3>🗺️ Regional Performance</h3>", unsafe_allow_html=True)
+            with col2f:
+                # Scatter 2: TGM vs Jumlah Buku
+                st.markdown("<h3 style='font-size: 0.85rem;'>📚 TGM vs Jumlah Buku Dibaca</h3>", unsafe_allow_html=True)
+
+                plot('scatter', feature='Jumlah Buku yang Dibaca')
     
-    region_stats = []
-    for region, provs in regions.items():
-        region_df = df[df['Provinsi'].isin(provs)]
-        if len(region_df) > 0:
-            region_stats.append({
-                'Region': region,
-                'Avg_TGM': region_df['Tingkat Kegemaran Membaca'].mean(),
-                'Count': len(region_df),
-                'Max': region_df['Tingkat Kegemaran Membaca'].max(),
-                'Min': region_df['Tingkat Kegemaran Membaca'].min()
-            })
+            # Second row of scatter plots
+            col2g, col2h = st.columns(2)
     
-    region_perf_df = pd.DataFrame(region_stats).sort_values('Avg_TGM', ascending=False)
+            with col2g:
+                # Scatter 3: TGM vs APS 19-23
+                st.markdown("<h3 style='font-size: 0.85rem;'>🎓 TGM vs APS (19-23 thn)</h3>", unsafe_allow_html=True)
+
+                plot('scatter', feature='APS_19_23')
     
-    fig_regional = go.Figure()
+            with col2h:
+                # Scatter 4: TGM vs APS 16-18
+                st.markdown("<h3 style='font-size: 0.85rem;'>🎓 TGM vs APS (16-18 thn)</h3>", unsafe_allow_html=True)
+
+                plot('scatter', feature='APS_16_18')
+
+@panel('what-if')
+def whatif_panel():
+    with lazy_section('🧪 What-if Scoring', 'lazy_whatif') as section:
+        if section.open:
+            # Classify a hypothetical province with the KNN model, then sweep two
+            # of its features over a grid to see where the Kategori flips
+            scorer = model.scorer
+            st.markdown("<h3>🧪 What-if Scoring</h3>", unsafe_allow_html=True)
+
+            base = st.selectbox('Start from', ['Rata-rata nasional', *dict.fromkeys(scorer.names)], key='whatif_base')
+            start = scorer.defaults if base == 'Rata-rata nasional' else scorer.X[np.flatnonzero(scorer.names == base)[0]]
+
+            values = []
+            input_cols = st.columns(3)
+            for i, feature in enumerate(scorer.columns):
+                with input_cols[i % 3]:
+                    # Keyed by the starting point so picking another one resets the inputs
+                    values.append(st.number_input(feature, value=round(float(start[i]), 2),
+                                                  key=f'whatif_{feature}_{base}'))
+
+            result = scorer.score(np.array([values]))
+            label = int(result.labels[0])
+            st.markdown(f"<div style='color: #fbbf24; font-weight: 800;'>Prediksi: {LABEL_MAP[label]} "
+                        f"(Label_TGM {label}, k={scorer.k})</div>", unsafe_allow_html=True)
+            nearest = pd.DataFrame({
+                'Provinsi': result.names[result.neighbors[0]],
+                'Distance': result.distances[0].round(2),
+            })
+            st.dataframe(nearest, hide_index=True, use_container_width=True)
+
+            axis_cols = st.columns(2)
+            with axis_cols[0]:
+                x = st.selectbox('Grid x', scorer.columns, index=scorer.columns.index(GRID_AXES[0]), key='whatif_x')
+            with axis_cols[1]:
+                y = st.selectbox('Grid y', scorer.columns, index=scorer.columns.index(GRID_AXES[1]), key='whatif_y')
+            if x == y:
+                st.caption('Pick two different features for the grid.')
+            else:
+                # Built per input, so kept out of the shared figure cache; the
+                # fixed key updates the chart in place instead of remounting it
+                with profiler.stage('figure'):
+                    spec = compact_json(build_whatif(model, x, y, tuple(values)))
+                show('whatif', spec)
+
+@panel('top 8')
+def top8_panel():
+    with lazy_section('👥 Top 8 Provinsi', 'lazy_top8') as section:
+        if section.open:
+            # Top 8 Provinces Performance
+            st.markdown("<h3>👥 Top 8 Provinsi</h3>", unsafe_allow_html=True)
+
+            plot('top8')
+
+# ===== MAIN CONTENT - 3 COLUMNS (REBALANCED) =====
+col1, col2, col3 = st.columns([1.3, 2, 0.8])
+
+# ===== LEFT COLUMN (WITH TOGGLE MOVED HERE) =====
+with col1, profiler.section('left column'):
+    trend_panel()
     
-    colors_regional = []
-    for avg in region_perf_df['Avg_TGM']:
-        if avg >= 72:
-            colors_regional.append('#00d9ff')
-        elif avg >= 68:
-            colors_regional.append('#0099cc')
-        elif avg >= 65:
-            colors_regional.append('#006699')
-        else:
-            colors_regional.append('#004d99')
+    st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
     
-    fig_regional.add_trace(go.Bar(
-        y=region_perf_df['Region'][::-1],
-        x=region_perf_df['Avg_TGM'][::-1],
-        orientation='h',
-        marker=dict(color=colors_regional[::-1], line=dict(color='#00d9ff', width=2)),
-        text=[f"{val:.1f}" for val in region_perf_df['Avg_TGM'][::-1]],
-        textposition='outside',
-        textfont=dict(size=13, color='#00d9ff', weight=900),
-        hovertemplate='<b>%{y}</b><br>Avg TGM: %{x:.2f}<br>Provinces: ' + 
-                     region_perf_df['Count'][::-1].astype(str) + 
-                     '<br>Range: ' + region_perf_df['Min'][::-1].round(1).astype(str) + 
-                     ' - ' + region_perf_df['Max'][::-1].round(1).astype(str) + '<extra></extra>',
-        showlegend=False
-    ))
+    corr_panel()
     
-    avg_all = df['Tingkat Kegemaran Membaca'].mean()
-    fig_regional.add_vline(
-        x=avg_all,
-        line_dash="dash",
-        line_color="#fbbf24",
-        line_width=2,
-        annotation_text=f"Avg: {avg_all:.1f}",
-        annotation_position="top",
-        annotation_font_color="#fbbf24",
-        annotation_font_size=10
-    )
+    st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
     
-    fig_regional.update_layout(
-        height=250,
-        margin=dict(l=30, r=50, t=10, b=30),
-        paper_bgcolor='rgba(0, 26, 51, 0.5)',
-        plot_bgcolor='rgba(0, 8, 20, 0.8)',
-        xaxis=dict(
-            showgrid=True,
-            gridcolor='rgba(0, 217, 255, 0.1)',
-            tickfont=dict(size=10, color='#4dd0e1'),
-            range=[60, 75],
-            title=dict(text='Average TGM Score', font=dict(size=10, color='#4dd0e1'))
-        ),
-        yaxis=dict(showgrid=False, tickfont=dict(size=10, color='#4dd0e1', weight=600))
-    )
-    st.plotly_chart(fig_regional, use_container_width=True, config={'displayModeBar': False})
+    left_lazy_panel()
 
 # ===== MIDDLE COLUMN =====
-with col2:
-    # Top 5 Provinces
-    st.markdown("<h3>🏆 Top 5 Provinsi by TGM Score</h3>", unsafe_allow_html=True)
-    
-    top_5 = df.nlargest(5, 'Tingkat Kegemaran Membaca')
-    
-    fig_top5 = go.Figure()
-    colors_gradient = ['#00d9ff', '#0099cc', '#006699', '#004d99', '#003366']
-    
-    fig_top5.add_trace(go.Bar(
-        y=top_5['Provinsi'][::-1],
-        x=top_5['Tingkat Kegemaran Membaca'][::-1],
-        orientation='h',
-        marker=dict(color=colors_gradient[::-1], line=dict(color='#00d9ff', width=2)),
-        text=['$' + str(int(x)) for x in top_5['Tingkat Kegemaran Membaca'][::-1]],
-        textposition='outside',
-        textfont=dict(size=12, color='#00d9ff', weight=700),
-        hovertemplate='<b>%{y}</b><br>TGM: %{x:.2f}<extra></extra>'
-    ))
-    
-    fig_top5.update_layout(
-        height=160,
-        margin=dict(l=10, r=60, t=10, b=20),
-        paper_bgcolor='rgba(0, 26, 51, 0.5)',
-        plot_bgcolor='rgba(0, 8, 20, 0.8)',
-        xaxis=dict(showgrid=True, gridcolor='rgba(0, 217, 255, 0.1)', range=[0, 90]),
-        yaxis=dict(showgrid=False, tickfont=dict(size=11, color='#4dd0e1', weight=600))
-    )
-    st.plotly_chart(fig_top5, use_container_width=True, config={'displayModeBar': False})
+with col2, profiler.section('middle grid'):
+    top5_panel()
     
     st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
     
@@ -416,523 +653,25 @@ with col2:
     col2a, col2b = st.columns(2)
     
     with col2a:
-        # KNN Accuracy by K Value
-        st.markdown("<h3 style='font-size: 0.9rem;'>🎯 KNN Model Evaluation</h3>", unsafe_allow_html=True)
-        
-        k_values = [int(k) for k in knn_eval['all_k_results'].keys()]
-        accuracies = [v * 100 for v in knn_eval['all_k_results'].values()]
-        
-        fig_knn = go.Figure()
-        
-        fig_knn.add_trace(go.Scatter(
-            x=k_values,
-            y=accuracies,
-            mode='lines+markers',
-            line=dict(color='#00d9ff', width=3),
-            marker=dict(
-                size=10,
-                color=accuracies,
-                colorscale=[[0, '#003366'], [0.5, '#0080ff'], [1, '#00d9ff']],
-                line=dict(width=2, color='white')
-            ),
-            text=[f'{a:.1f}%' for a in accuracies],
-            textposition='top center',
-            textfont=dict(size=9, color='#00d9ff', weight=600),
-            hovertemplate='<b>K=%{x}</b><br>Accuracy: %{y:.2f}%<extra></extra>'
-        ))
-        
-        best_idx = k_values.index(best_k)
-        fig_knn.add_trace(go.Scatter(
-            x=[best_k],
-            y=[accuracies[best_idx]],
-            mode='markers+text',
-            marker=dict(size=20, color='#fbbf24', line=dict(width=3, color='white')),
-            text=[f'BEST<br>K={best_k}'],
-            textposition='bottom center',
-            textfont=dict(size=10, color='#fbbf24', weight=700),
-            hovertemplate=f'<b>OPTIMAL K={best_k}</b><br>Accuracy: {accuracies[best_idx]:.2f}%<extra></extra>',
-            showlegend=False
-        ))
-        
-        fig_knn.update_layout(
-            height=300,
-            margin=dict(l=30, r=10, t=10, b=30),
-            paper_bgcolor='rgba(0, 26, 51, 0.5)',
-            plot_bgcolor='rgba(0, 8, 20, 0.8)',
-            xaxis=dict(
-                title='K Value',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1'),
-                tickvals=k_values
-            ),
-            yaxis=dict(
-                title='Accuracy (%)',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1'),
-                range=[60, 90]
-            ),
-            showlegend=False
-        )
-        st.plotly_chart(fig_knn, use_container_width=True, config={'displayModeBar': False})
+        knn_panel()
     
     with col2b:
-        # APS Decline Trend
-        st.markdown("<h3 style='font-size: 0.9rem;'>📉 APS Decline by Age Group</h3>", unsafe_allow_html=True)
-        
-        aps_data = {
-            'Label': ['7-12 thn', '13-15 thn', '16-18 thn', '19-23 thn'],
-            'APS': [
-                df['APS_7_12'].mean(),
-                df['APS_13_15'].mean(),
-                df['APS_16_18'].mean(),
-                df['APS_19_23'].mean()
-            ]
-        }
-        aps_df = pd.DataFrame(aps_data)
-        
-        fig_aps = go.Figure()
-        
-        fig_aps.add_trace(go.Scatter(
-            x=aps_df['Label'],
-            y=aps_df['APS'],
-            mode='lines+markers',
-            line=dict(color='#00d9ff', width=3),
-            marker=dict(size=10, color='#00d9ff', line=dict(width=2, color='white')),
-            fill='tozeroy',
-            fillcolor='rgba(0, 217, 255, 0.2)',
-            text=[f'{v:.1f}%' for v in aps_df['APS']],
-            textposition='top center',
-            textfont=dict(size=10, color='#00d9ff', weight=700),
-            hovertemplate='<b>%{x}</b><br>APS: %{y:.2f}%<extra></extra>'
-        ))
-        
-        fig_aps.add_annotation(
-            x='19-23 thn',
-            y=aps_df['APS'].iloc[-1],
-            text='⚠️ DROP 76%',
-            showarrow=True,
-            arrowhead=2,
-            arrowsize=1,
-            arrowwidth=2,
-            arrowcolor='#ff4444',
-            ax=40,
-            ay=-40,
-            font=dict(size=11, color='#ff4444', weight=700),
-            bgcolor='rgba(255, 68, 68, 0.2)',
-            bordercolor='#ff4444',
-            borderwidth=2
-        )
-        
-        fig_aps.update_layout(
-            height=250,
-            margin=dict(l=30, r=10, t=10, b=30),
-            paper_bgcolor='rgba(0, 26, 51, 0.5)',
-            plot_bgcolor='rgba(0, 8, 20, 0.8)',
-            xaxis=dict(showgrid=False, tickfont=dict(size=9, color='#4dd0e1')),
-            yaxis=dict(
-                title='APS (%)',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1'),
-                range=[0, 110]
-            )
-        )
-        st.plotly_chart(fig_aps, use_container_width=True, config={'displayModeBar': False})
+        aps_panel()
     
     st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
     
-    # Bottom 2x2 Grid
-    col2c, col2d = st.columns(2)
-    
-    with col2c:
-        st.markdown("<h3 style='font-size: 0.9rem;'>🗺️ TGM by Region</h3>", unsafe_allow_html=True)
-        
-        region_avg = []
-        for region, provs in regions.items():
-            avg = df[df['Provinsi'].isin(provs)]['Tingkat Kegemaran Membaca'].mean()
-            if not pd.isna(avg):
-                region_avg.append({'Region': region, 'TGM': avg})
-        
-        region_avg_df = pd.DataFrame(region_avg)
-        
-        fig_region_pie = go.Figure(data=[go.Pie(
-            labels=region_avg_df['Region'],
-            values=region_avg_df['TGM'],
-            hole=0.5,
-            marker=dict(
-                colors=['#00d9ff', '#0099cc', '#006699', '#004d99'],
-                line=dict(color='#000814', width=2)
-            ),
-            textinfo='label+percent',
-            textfont=dict(size=9, color='white', weight=600),
-            hovertemplate='<b>%{label}</b><br>Avg TGM: %{value:.2f}<extra></extra>'
-        )])
-        
-        fig_region_pie.add_annotation(
-            text=f"<b>AVG</b><br>{region_avg_df['TGM'].mean():.1f}",
-            x=0.5, y=0.5,
-            font=dict(size=16, color='#00d9ff'),
-            showarrow=False
-        )
-        
-        fig_region_pie.update_layout(
-            height=250,
-            margin=dict(l=0, r=0, t=0, b=0),
-            paper_bgcolor='rgba(0, 26, 51, 0.5)',
-            showlegend=False
-        )
-        st.plotly_chart(fig_region_pie, use_container_width=True, config={'displayModeBar': False})
-    
-    with col2d:
-        st.markdown("<h3 style='font-size: 0.9rem;'>📚 Feature Importance</h3>", unsafe_allow_html=True)
-        
-        features_short = ['Frek.Baca', 'Jml.Buku', 'Durasi', 'APS 19-23', 'Frek.Net']
-        importance = [95, 90, 88, 78, 72]
-        colors_feat = ['#00d9ff', '#00d9ff', '#0099cc', '#006699', '#004d99']
-        
-        fig_feat = go.Figure()
-        fig_feat.add_trace(go.Bar(
-            y=features_short[::-1],
-            x=importance[::-1],
-            orientation='h',
-            marker=dict(color=colors_feat[::-1], line=dict(color='#00d9ff', width=1)),
-            text=importance[::-1],
-            textposition='outside',
-            textfont=dict(size=10, color='#00d9ff', weight=600),
-            hovertemplate='<b>%{y}</b><br>Importance: %{x}<extra></extra>'
-        ))
-        
-        fig_feat.update_layout(
-            height=180,
-            margin=dict(l=10, r=30, t=10, b=10),
-            paper_bgcolor='rgba(0, 26, 51, 0.5)',
-            plot_bgcolor='rgba(0, 8, 20, 0.8)',
-            xaxis=dict(showgrid=True, gridcolor='rgba(0, 217, 255, 0.1)', range=[0, 105]),
-            yaxis=dict(showgrid=False, tickfont=dict(size=9, color='#4dd0e1'))
-        )
-        st.plotly_chart(fig_feat, use_container_width=True, config={'displayModeBar': False})
+    region_features_panel()
     
     st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
     
-    # 🆕 NEW: 2x2 Correlation Scatter Plots
-    st.markdown("<h3>🔬 Correlation Analysis: TGM vs Key Features</h3>", unsafe_allow_html=True)
-    
-    col2e, col2f = st.columns(2)
-    
-    with col2e:
-        # Scatter 1: TGM vs Frekuensi Membaca
-        st.markdown("<h3 style='font-size: 0.85rem;'>📖 TGM vs Frekuensi Membaca</h3>", unsafe_allow_html=True)
-        
-        corr_frek = df['Tingkat Kegemaran Membaca'].corr(df['Frekuensi Membaca'])
-        
-        fig_scatter1 = go.Figure()
-        
-        # Color by kategori
-        colors_scatter = {'Tinggi': '#00d9ff', 'Sedang': '#0099cc', 'Rendah': '#ef4444'}
-        
-        for cat in ['Tinggi', 'Sedang', 'Rendah']:
-            cat_data = df[df['Kategori'] == cat]
-            fig_scatter1.add_trace(go.Scatter(
-                x=cat_data['Frekuensi Membaca'],
-                y=cat_data['Tingkat Kegemaran Membaca'],
-                mode='markers',
-                name=cat,
-                marker=dict(
-                    size=10,
-                    color=colors_scatter[cat],
-                    line=dict(width=1, color='white'),
-                    opacity=0.8
-                ),
-                text=cat_data['Provinsi'],
-                hovertemplate='<b>%{text}</b><br>Frek: %{x}<br>TGM: %{y:.2f}<extra></extra>'
-            ))
-        
-        # Add trendline
-        z = np.polyfit(df['Frekuensi Membaca'], df['Tingkat Kegemaran Membaca'], 1)
-        p = np.poly1d(z)
-        x_trend = np.linspace(df['Frekuensi Membaca'].min(), df['Frekuensi Membaca'].max(), 100)
-        
-        fig_scatter1.add_trace(go.Scatter(
-            x=x_trend,
-            y=p(x_trend),
-            mode='lines',
-            name='Trendline',
-            line=dict(color='#fbbf24', width=2, dash='dash'),
-            showlegend=False,
-            hovertemplate='Trendline<extra></extra>'
-        ))
-        
-        fig_scatter1.add_annotation(
-            text=f'<b>r = {corr_frek:.3f}</b><br>Strong',
-            xref='paper', yref='paper',
-            x=0.05, y=0.95,
-            showarrow=False,
-            bgcolor='rgba(0, 217, 255, 0.2)',
-            bordercolor='#00d9ff',
-            borderwidth=2,
-            font=dict(size=11, color='#00d9ff', weight=700)
-        )
-        
-        fig_scatter1.update_layout(
-            height=200,
-            margin=dict(l=30, r=10, t=10, b=30),
-            paper_bgcolor='rgba(0, 26, 51, 0.5)',
-            plot_bgcolor='rgba(0, 8, 20, 0.8)',
-            xaxis=dict(
-                title='Frekuensi Membaca',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1')
-            ),
-            yaxis=dict(
-                title='TGM Score',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1')
-            ),
-            legend=dict(
-                orientation='h',
-                yanchor='bottom',
-                y=-0.3,
-                xanchor='center',
-                x=0.5,
-                font=dict(color='white', size=8)
-            ),
-            showlegend=False
-        )
-        st.plotly_chart(fig_scatter1, use_container_width=True, config={'displayModeBar': False})
-    
-    with col2f:
-        # Scatter 2: TGM vs Jumlah Buku
-        st.markdown("<h3 style='font-size: 0.85rem;'>📚 TGM vs Jumlah Buku Dibaca</h3>", unsafe_allow_html=True)
-        
-        corr_buku = df['Tingkat Kegemaran Membaca'].corr(df['Jumlah Buku yang Dibaca'])
-        
-        fig_scatter2 = go.Figure()
-        
-        for cat in ['Tinggi', 'Sedang', 'Rendah']:
-            cat_data = df[df['Kategori'] == cat]
-            fig_scatter2.add_trace(go.Scatter(
-                x=cat_data['Jumlah Buku yang Dibaca'],
-                y=cat_data['Tingkat Kegemaran Membaca'],
-                mode='markers',
-                name=cat,
-                marker=dict(
-                    size=10,
-                    color=colors_scatter[cat],
-                    line=dict(width=1, color='white'),
-                    opacity=0.8
-                ),
-                text=cat_data['Provinsi'],
-                hovertemplate='<b>%{text}</b><br>Buku: %{x}<br>TGM: %{y:.2f}<extra></extra>'
-            ))
-        
-        # Add trendline
-        z2 = np.polyfit(df['Jumlah Buku yang Dibaca'], df['Tingkat Kegemaran Membaca'], 1)
-        p2 = np.poly1d(z2)
-        x_trend2 = np.linspace(df['Jumlah Buku yang Dibaca'].min(), df['Jumlah Buku yang Dibaca'].max(), 100)
-        
-        fig_scatter2.add_trace(go.Scatter(
-            x=x_trend2,
-            y=p2(x_trend2),
-            mode='lines',
-            name='Trendline',
-            line=dict(color='#fbbf24', width=2, dash='dash'),
-            showlegend=False
-        ))
-        
-        fig_scatter2.add_annotation(
-            text=f'<b>r = {corr_buku:.3f}</b><br>Strong',
-            xref='paper', yref='paper',
-            x=0.05, y=0.95,
-            showarrow=False,
-            bgcolor='rgba(0, 217, 255, 0.2)',
-            bordercolor='#00d9ff',
-            borderwidth=2,
-            font=dict(size=11, color='#00d9ff', weight=700)
-        )
-        
-        fig_scatter2.update_layout(
-            height=200,
-            margin=dict(l=30, r=10, t=10, b=30),
-            paper_bgcolor='rgba(0, 26, 51, 0.5)',
-            plot_bgcolor='rgba(0, 8, 20, 0.8)',
-            xaxis=dict(
-                title='Jumlah Buku Dibaca',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1')
-            ),
-            yaxis=dict(
-                title='TGM Score',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1')
-            ),
-            showlegend=False
-        )
-        st.plotly_chart(fig_scatter2, use_container_width=True, config={'displayModeBar': False})
-    
-    # Second row of scatter plots
-    col2g, col2h = st.columns(2)
-    
-    with col2g:
-        # Scatter 3: TGM vs APS 19-23
-        st.markdown("<h3 style='font-size: 0.85rem;'>🎓 TGM vs APS (19-23 thn)</h3>", unsafe_allow_html=True)
-        
-        corr_aps1923 = df['Tingkat Kegemaran Membaca'].corr(df['APS_19_23'])
-        
-        fig_scatter3 = go.Figure()
-        
-        for cat in ['Tinggi', 'Sedang', 'Rendah']:
-            cat_data = df[df['Kategori'] == cat]
-            fig_scatter3.add_trace(go.Scatter(
-                x=cat_data['APS_19_23'],
-                y=cat_data['Tingkat Kegemaran Membaca'],
-                mode='markers',
-                name=cat,
-                marker=dict(
-                    size=10,
-                    color=colors_scatter[cat],
-                    line=dict(width=1, color='white'),
-                    opacity=0.8
-                ),
-                text=cat_data['Provinsi'],
-                hovertemplate='<b>%{text}</b><br>APS: %{x:.1f}%<br>TGM: %{y:.2f}<extra></extra>'
-            ))
-        
-        # Add trendline
-        z3 = np.polyfit(df['APS_19_23'], df['Tingkat Kegemaran Membaca'], 1)
-        p3 = np.poly1d(z3)
-        x_trend3 = np.linspace(df['APS_19_23'].min(), df['APS_19_23'].max(), 100)
-        
-        fig_scatter3.add_trace(go.Scatter(
-            x=x_trend3,
-            y=p3(x_trend3),
-            mode='lines',
-            name='Trendline',
-            line=dict(color='#fbbf24', width=2, dash='dash'),
-            showlegend=False
-        ))
-        
-        fig_scatter3.add_annotation(
-            text=f'<b>r = {corr_aps1923:.3f}</b><br>Weak ⚠️',
-            xref='paper', yref='paper',
-            x=0.05, y=0.95,
-            showarrow=False,
-            bgcolor='rgba(239, 68, 68, 0.2)',
-            bordercolor='#ef4444',
-            borderwidth=2,
-            font=dict(size=11, color='#ef4444', weight=700)
-        )
-        
-        fig_scatter3.update_layout(
-            height=200,
-            margin=dict(l=30, r=10, t=10, b=30),
-            paper_bgcolor='rgba(0, 26, 51, 0.5)',
-            plot_bgcolor='rgba(0, 8, 20, 0.8)',
-            xaxis=dict(
-                title='APS 19-23 tahun (%)',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1')
-            ),
-            yaxis=dict(
-                title='TGM Score',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1')
-            ),
-            showlegend=False
-        )
-        st.plotly_chart(fig_scatter3, use_container_width=True, config={'displayModeBar': False})
-    
-    with col2h:
-        # Scatter 4: TGM vs APS 16-18
-        st.markdown("<h3 style='font-size: 0.85rem;'>🎓 TGM vs APS (16-18 thn)</h3>", unsafe_allow_html=True)
-        
-        corr_aps1618 = df['Tingkat Kegemaran Membaca'].corr(df['APS_16_18'])
-        
-        fig_scatter4 = go.Figure()
-        
-        for cat in ['Tinggi', 'Sedang', 'Rendah']:
-            cat_data = df[df['Kategori'] == cat]
-            fig_scatter4.add_trace(go.Scatter(
-                x=cat_data['APS_16_18'],
-                y=cat_data['Tingkat Kegemaran Membaca'],
-                mode='markers',
-                name=cat,
-                marker=dict(
-                    size=10,
-                    color=colors_scatter[cat],
-                    line=dict(width=1, color='white'),
-                    opacity=0.8
-                ),
-                text=cat_data['Provinsi'],
-                hovertemplate='<b>%{text}</b><br>APS: %{x:.1f}%<br>TGM: %{y:.2f}<extra></extra>'
-            ))
-        
-        # Add trendline
-        z4 = np.polyfit(df['APS_16_18'], df['Tingkat Kegemaran Membaca'], 1)
-        p4 = np.poly1d(z4)
-        x_trend4 = np.linspace(df['APS_16_18'].min(), df['APS_16_18'].max(), 100)
-        
-        fig_scatter4.add_trace(go.Scatter(
-            x=x_trend4,
-            y=p4(x_trend4),
-            mode='lines',
-            name='Trendline',
-            line=dict(color='#fbbf24', width=2, dash='dash'),
-            showlegend=False
-        ))
-        
-        fig_scatter4.add_annotation(
-            text=f'<b>r = {corr_aps1618:.3f}</b><br>Moderate ⭐',
-            xref='paper', yref='paper',
-            x=0.05, y=0.95,
-            showarrow=False,
-            bgcolor='rgba(251, 191, 36, 0.2)',
-            bordercolor='#fbbf24',
-            borderwidth=2,
-            font=dict(size=11, color='#fbbf24', weight=700)
-        )
-        
-        fig_scatter4.update_layout(
-            height=200,
-            margin=dict(l=30, r=10, t=10, b=30),
-            paper_bgcolor='rgba(0, 26, 51, 0.5)',
-            plot_bgcolor='rgba(0, 8, 20, 0.8)',
-            xaxis=dict(
-                title='APS 16-18 tahun (%)',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1')
-            ),
-            yaxis=dict(
-                title='TGM Score',
-                titlefont=dict(size=10, color='#4dd0e1'),
-                showgrid=True,
-                gridcolor='rgba(0, 217, 255, 0.1)',
-                tickfont=dict(size=9, color='#4dd0e1')
-            ),
-            showlegend=False
-        )
-        st.plotly_chart(fig_scatter4, use_container_width=True, config={'displayModeBar': False})
+    scatter_panel()
+
+    st.markdown("<div style='margin: 15px 0;'></div>", unsafe_allow_html=True)
+
+    whatif_panel()
 
 # ===== RIGHT COLUMN (NOW CLEANER) =====
-with col3:
+with col3, profiler.section('right column'):
     # Combined: Model Config + Statistics
     st.markdown(f"""
     <div style='background: rgba(0, 26, 51, 0.6); border: 1px solid #00d9ff; border-radius: 8px; padding: 10px; margin-bottom: 10px;'>
@@ -952,22 +691,21 @@ with col3:
             </div>
             <div style='background: rgba(0, 51, 102, 0.5); padding: 6px; border-radius: 5px; text-align: center;'>
                 <div style='color: #4dd0e1; font-size: 0.65rem;'>Features</div>
-                <div style='color: #00d9ff; font-weight: 700; font-size: 0.85rem;'>9</div>
+                <div style='color: #00d9ff; font-weight: 700; font-size: 0.85rem;'>{len(FEATURE_COLUMNS)}</div>
             </div>
             <div style='background: rgba(0, 51, 102, 0.5); padding: 6px; border-radius: 5px; text-align: center;'>
                 <div style='color: #4dd0e1; font-size: 0.65rem;'>Max TGM</div>
-                <div style='color: #00d9ff; font-weight: 700; font-size: 0.85rem;'>{df['Tingkat Kegemaran Membaca'].max():.1f}</div>
+                <div style='color: #00d9ff; font-weight: 700; font-size: 0.85rem;'>{model.max_tgm:.1f}</div>
             </div>
             <div style='background: rgba(0, 51, 102, 0.5); padding: 6px; border-radius: 5px; text-align: center;'>
                 <div style='color: #4dd0e1; font-size: 0.65rem;'>Min TGM</div>
-                <div style='color: #00d9ff; font-weight: 700; font-size: 0.85rem;'>{df['Tingkat Kegemaran Membaca'].min():.1f}</div>
+                <div style='color: #00d9ff; font-weight: 700; font-size: 0.85rem;'>{model.min_tgm:.1f}</div>
             </div>
         </div>
     </div>
     """, unsafe_allow_html=True)
     
     # Combined: Kategori + Regions
-    categories = df['Kategori'].value_counts()
     st.markdown("""
     <div style='background: rgba(0, 26, 51, 0.6); border: 1px solid #00d9ff; border-radius: 8px; padding: 10px; margin-bottom: 10px;'>
         <h3 style='font-size: 0.8rem; margin: 0 0 8px 0;'>📊 KATEGORI & REGIONS</h3>
@@ -987,9 +725,9 @@ with col3:
     
     st.markdown("</div><div>", unsafe_allow_html=True)
     
+    region_avg_map = model.region_stats.set_index('Region')['Avg_TGM']
     for region in ['Jawa', 'Sumatera', 'Kalimantan', 'Sulawesi']:
-        region_provs = df[df['Provinsi'].isin(regions[region])]
-        avg_tgm_region = region_provs['Tingkat Kegemaran Membaca'].mean()
+        avg_tgm_region = region_avg_map.get(region, float('nan'))
         st.markdown(f"""
         <div style='background: rgba(0, 51, 102, 0.4); padding: 5px 8px; border-radius: 4px; margin: 2px 0; display: flex; justify-content: space-between;'>
             <span style='color: #4dd0e1; font-size: 0.7rem;'>{region}</span>
@@ -1004,8 +742,8 @@ with col3:
     <div style='background: rgba(0, 26, 51, 0.6); border: 1px solid #00d9ff; border-radius: 8px; padding: 10px; margin-bottom: 10px;'>
         <h3 style='font-size: 0.8rem; margin: 0 0 8px 0;'>💡 KEY INSIGHTS</h3>
         <div style='background: rgba(0, 51, 102, 0.5); padding: 6px 8px; border-radius: 5px; margin: 3px 0; border-left: 3px solid #fbbf24;'>
-            <div style='color: #fbbf24; font-size: 0.7rem; font-weight: 800;'>🎯 K=1 Optimal</div>
-            <div style='color: #4dd0e1; font-size: 0.65rem;'>Akurasi 83.3% (tertinggi)</div>
+            <div style='color: #fbbf24; font-size: 0.7rem; font-weight: 800;'>🎯 K={best_k} Optimal</div>
+            <div style='color: #4dd0e1; font-size: 0.65rem;'>Akurasi {best_accuracy:.1f}% (tertinggi)</div>
         </div>
         <div style='background: rgba(0, 51, 102, 0.5); padding: 6px 8px; border-radius: 5px; margin: 3px 0; border-left: 3px solid #ff4444;'>
             <div style='color: #ff4444; font-size: 0.7rem; font-weight: 800;'>📉 APS Drop 76%</div>
@@ -1017,50 +755,38 @@ with col3:
         </div>
         <div style='background: rgba(0, 51, 102, 0.5); padding: 6px 8px; border-radius: 5px; margin: 3px 0; border-left: 3px solid #00d9ff;'>
             <div style='color: #00d9ff; font-size: 0.7rem; font-weight: 800;'>📚 Top Feature</div>
-            <div style='color: #4dd0e1; font-size: 0.65rem;'>Frekuensi Membaca (95%)</div>
+            <div style='color: #4dd0e1; font-size: 0.65rem;'>{top_feature['Feature']} (-{top_feature['Mean'] * 100:.1f} pts akurasi)</div>
         </div>
     </div>
     """, unsafe_allow_html=True)
     
-    # Top 8 Provinces Performance
-    st.markdown("<h3>👥 Top 8 Provinsi</h3>", unsafe_allow_html=True)
-    
-    top_8 = df.nlargest(8, 'Tingkat Kegemaran Membaca')
-    
-    fig_top8_right = go.Figure()
-    fig_top8_right.add_trace(go.Bar(
-        y=top_8['Provinsi'][::-1],
-        x=top_8['Tingkat Kegemaran Membaca'][::-1],
-        orientation='h',
-        marker=dict(
-            color=top_8['Tingkat Kegemaran Membaca'][::-1],
-            colorscale=[[0, '#003366'], [0.5, '#0080ff'], [1, '#00d9ff']],
-            line=dict(color='#00d9ff', width=1)
-        ),
-        text=top_8['Tingkat Kegemaran Membaca'][::-1].round(1),
-        textposition='outside',
-        textfont=dict(size=17, color='#00d9ff', weight=800),
-        hovertemplate='<b>%{y}</b><br>TGM: %{x:.2f}<extra></extra>'
-    ))
-    
-    fig_top8_right.update_layout(
-        height=450,
-        margin=dict(l=10, r=40, t=10, b=10),
-        paper_bgcolor='rgba(0, 26, 51, 0.5)',
-        plot_bgcolor='rgba(0, 8, 20, 0.8)',
-        xaxis=dict(showgrid=True, gridcolor='rgba(0, 217, 255, 0.1)', range=[0, 90]),
-        yaxis=dict(showgrid=False, tickfont=dict(size=8, color='#4dd0e1'))
-    )
-    st.plotly_chart(fig_top8_right, use_container_width=True, config={'displayModeBar': False})
+    top8_panel()
 
 # Footer
 st.markdown("<div style='margin: 20px 0;'></div>", unsafe_allow_html=True)
-st.markdown("""
+st.markdown(f"""
 <div style='background: linear-gradient(90deg, #001a33 0%, #003366 50%, #001a33 100%); 
             padding: 15px; text-align: center; border-top: 2px solid #00d9ff; 
             box-shadow: 0 -4px 20px rgba(0, 217, 255, 0.3);'>
     <p style='color: #00d9ff; font-size: 0.9rem; margin: 0; font-weight: 600;'>
-        ⚡ POWERED BY K-NEAREST NEIGHBORS | K=1 | ACCURACY: 83.3% | 38 PROVINSI INDONESIA 2024 ⚡
+        ⚡ POWERED BY K-NEAREST NEIGHBORS | K={best_k} | ACCURACY: {best_accuracy:.1f}% | {total_provinces} PROVINSI INDONESIA 2024 ⚡
     </p>
 </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+# Profiling overlay (opt-in with ?profile=1 or DASHBOARD_PROFILE=1)
+if profiler.enabled:
+    with st.expander("⏱️ Render profile (ms)", expanded=False):
+        st.dataframe(profiler.summary(), use_container_width=True)
+        st.caption(f"Figure cache: {figure_cache.hits} hits / {figure_cache.misses} misses")
+        st.caption(f"Figure payload: {payload.used / 1024:.0f} KB of {payload.limit / 1024:.0f} KB")
+profiler.finish(data_hash=data_hash)
+
+# Pick up pipeline rewrites of the data file (or a new artifact bundle)
+# without a server restart
+@st.fragment(run_every=WATCH_INTERVAL)
+def watch_data_file():
+    if poll_source() != source:
+        st.rerun()
+
+watch_data_file()
\ No newline at end of file
@@ -0,0 +1,366 @@
+import base64
+import json
+import os
+import subprocess
+import sys
+import textwrap
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import plotly.graph_objects as go
+
+from dashboard_model import (APS_COLUMNS, CORR_FEATURES, REGIONS, SCATTER_FEATURES, TGM_COL, correlation_engine,
+                             load_tables, province_stats, subset_stats)
+from data_store import CODE_DIR, columnar_path, has_columnar, load_sections, write_columnar
+from figures import compact_json
+from importance import permutation_importance
+from knn_engine import FEATURE_COLUMNS, LABEL_COL, N_CLASSES, evaluate, feature_matrix
+from neighbors import KDTree
+from profiling import Profiler
+from schema import validate
+from timeseries import TimeSeriesStore
+
+SHIPPED_DATA = os.path.join(CODE_DIR, 'dashboard_data.json')
+
+
+@pytest.fixture(scope='module')
+def provinces():
+    return load_tables(SHIPPED_DATA)[0]
+
+
+def test_loo_accuracy_matches_scikit_learn(provinces):
+    pytest.importorskip('sklearn')
+    from sklearn.model_selection import LeaveOneOut, cross_val_score
+    from sklearn.neighbors import KNeighborsClassifier
+
+    result = evaluate(provinces)
+    Z = feature_matrix(provinces)
+    y = provinces[LABEL_COL].to_numpy()
+    for k, accuracy in result['all_k_results'].items():
+        expected = cross_val_score(KNeighborsClassifier(n_neighbors=int(k)), Z, y, cv=LeaveOneOut()).mean()
+        assert accuracy == pytest.approx(expected), f'k={k}'
+    assert result['best_accuracy'] == max(result['all_k_results'].values())
+
+
+def test_sampled_loo_holds_out_only_the_sampled_rows(provinces):
+    pytest.importorskip('sklearn')
+    from sklearn.neighbors import KNeighborsClassifier
+
+    result = evaluate(provinces, max_rows=20)
+    assert result['rows'] == 20
+    rows = np.sort(np.random.default_rng(0).choice(len(provinces), 20, replace=False))
+    Z = feature_matrix(provinces)
+    y = provinces[LABEL_COL].to_numpy()
+    for k, accuracy in result['all_k_results'].items():
+        hits = [KNeighborsClassifier(n_neighbors=int(k)).fit(np.delete(Z, i, axis=0), np.delete(y, i))
+                .predict(Z[i:i + 1])[0] == y[i] for i in rows]
+        assert accuracy == pytest.approx(np.mean(hits)), f'k={k}'
+
+
+def _loo_accuracy(Q, Z, y, k):
+    # Brute-force leave-one-out vote: queries Q against reference rows Z
+    d = ((Q[:, None, :] - Z[None, :, :]) ** 2).sum(axis=2)
+    np.fill_diagonal(d, np.inf)
+    nearest = np.argsort(d, axis=1, kind='stable')[:, :k]
+    votes = np.array([np.bincount(row, minlength=N_CLASSES).argmax() for row in y[nearest]])
+    return (votes == y).mean()
+
+
+def test_permutation_importance_matches_brute_force(provinces):
+    k, n_repeats = 5, 3
+    result = permutation_importance(provinces, k, n_repeats=n_repeats)
+    Z = feature_matrix(provinces)
+    y = provinces[LABEL_COL].to_numpy()
+    baseline = _loo_accuracy(Z, Z, y, k)
+    assert result.baseline == pytest.approx(baseline)
+
+    # Same permutations, in the same order, as permutation_importance draws them
+    rng = np.random.default_rng(0)
+    drops = {}
+    for f, feature in enumerate(FEATURE_COLUMNS):
+        for _ in range(n_repeats):
+            Q = Z.copy()
+            Q[:, f] = Z[rng.permutation(len(Z)), f]
+            drops.setdefault(feature, []).append(baseline - _loo_accuracy(Q, Z, y, k))
+    for row in result.importances.itertuples():
+        assert row.Mean == pytest.approx(np.mean(drops[row.Feature])), row.Feature
+        assert row.Std == pytest.approx(np.std(drops[row.Feature])), row.Feature
+
+
+def test_kd_tree_matches_brute_force():
+    rng = np.random.default_rng(0)
+    X = rng.normal(size=(3000, len(FEATURE_COLUMNS)))
+    tree = KDTree(X, leaf_size=64)
+    for row in rng.choice(len(X), 20, replace=False):
+        indices, distances = tree.query(X[row], 10, exclude=row)
+        d = np.sqrt(((X - X[row]) ** 2).sum(axis=1))
+        d[row] = np.inf
+        expected = np.argsort(d, kind='stable')[:10]
+        assert list(indices) == list(expected)
+        assert distances == pytest.approx(d[expected])
+
+
+@pytest.mark.parametrize('rows', [None, np.arange(0, 38, 2)])
+def test_correlation_engine_matches_pandas_and_polyfit(provinces, rows):
+    frame = provinces if rows is None else provinces.iloc[rows]
+    corr_matrix, trends = correlation_engine(provinces, CORR_FEATURES, rows=rows)
+    expected = frame[CORR_FEATURES].corr()
+    assert np.allclose(corr_matrix.to_numpy(), expected.to_numpy())
+    for feature, trend in trends.items():
+        slope, intercept = np.polyfit(frame[feature], frame[TGM_COL], 1)
+        assert trend.slope == pytest.approx(slope), feature
+        assert trend.intercept == pytest.approx(intercept), feature
+        assert trend.r == pytest.approx(expected.loc[feature, TGM_COL]), feature
+        assert trend.y == pytest.approx(slope * trend.x + intercept), feature
+        assert (trend.x[0], trend.x[-1]) == (frame[feature].min(), frame[feature].max())
+
+
+def test_correlation_engine_leaves_a_constant_column_undefined(provinces):
+    # Durasi Membaca1 is the same for every province
+    corr_matrix, trends = correlation_engine(provinces, [TGM_COL, 'Durasi Membaca1', 'APS_19_23'])
+    assert np.isnan(corr_matrix.loc['Durasi Membaca1']).all()
+    assert np.isnan(trends['Durasi Membaca1'].slope)
+    assert corr_matrix.loc[TGM_COL, 'APS_19_23'] == pytest.approx(provinces[TGM_COL].corr(provinces['APS_19_23']))
+
+
+def _page_stats(df):
+    # The statistics as the page computed them before they moved to the model
+    top_region, top_region_tgm = None, 0
+    for region, provs in REGIONS.items():
+        avg = df[df['Provinsi'].isin(provs)][TGM_COL].mean()
+        if avg > top_region_tgm:
+            top_region_tgm, top_region = avg, region
+    region_stats = []
+    for region, provs in REGIONS.items():
+        region_df = df[df['Provinsi'].isin(provs)]
+        if len(region_df) > 0:
+            region_stats.append({'Region': region, 'Avg_TGM': region_df[TGM_COL].mean(), 'Count': len(region_df),
+                                 'Max': region_df[TGM_COL].max(), 'Min': region_df[TGM_COL].min()})
+    return dict(
+        total_provinces=len(df),
+        tinggi_count=len(df[df['Kategori'] == 'Tinggi']),
+        avg_tgm=df[TGM_COL].mean(),
+        top_province=df.nlargest(1, TGM_COL).iloc[0]['Provinsi'],
+        top_region=top_region,
+        top_region_tgm=top_region_tgm,
+        categories=df['Kategori'].value_counts().to_dict(),
+        region_perf=pd.DataFrame(region_stats).sort_values('Avg_TGM', ascending=False),
+        aps_means=[df[column].mean() for column in APS_COLUMNS],
+        top_5=list(df.nlargest(5, TGM_COL)['Provinsi']),
+        top_15=list(df.nlargest(15, TGM_COL).sort_values(TGM_COL)['Provinsi']),
+    )
+
+
+@pytest.mark.parametrize('mask', [None, 'Jawa', 'Tinggi'])
+def test_page_statistics_match_the_original_page(provinces, mask):
+    if mask is None:
+        stats, frame = province_stats(provinces), provinces
+        assert stats['corr_tgm_aps'] == pytest.approx(provinces[TGM_COL].corr(provinces['APS_19_23']))
+        assert np.allclose(stats['corr_matrix'], provinces[CORR_FEATURES].corr())
+    else:
+        selected = (provinces['Region'] == mask) | (provinces['Kategori'] == mask)
+        stats, frame = subset_stats(provinces, selected.to_numpy()), provinces[selected]
+    expected = _page_stats(frame)
+
+    for key in ('total_provinces', 'tinggi_count', 'top_province', 'top_region', 'categories'):
+        assert stats[key] == expected[key], key
+    for key in ('avg_tgm', 'top_region_tgm', 'aps_means'):
+        assert stats[key] == pytest.approx(expected[key]), key
+    assert list(stats['top_5']['Provinsi']) == expected['top_5']
+    assert list(stats['top_15']['Provinsi']) == expected['top_15']
+    region_perf = expected['region_perf']
+    assert list(stats['region_perf']['Region']) == list(region_perf['Region'])
+    for column in ('Avg_TGM', 'Count', 'Max', 'Min'):
+        assert stats['region_perf'][column].to_numpy() == pytest.approx(region_perf[column].to_numpy()), column
+    assert set(stats['trends']) == set(SCATTER_FEATURES)
+
+
+def test_fragment_rerun_writes_its_own_profile(tmp_path):
+    log = tmp_path / 'profile.jsonl'
+    profiler = Profiler(enabled=True, log=str(log))
+    # The page run: panels are sections of it, dumped once at the end
+    with profiler.run('trend') as alone:
+        assert not alone
+        with profiler.stage('figure'):
+            pass
+    with profiler.section('right column'), profiler.stage('aggregate'):
+        pass
+    profiler.finish(data_hash='abc')
+    # A fragment-only rerun reuses the finished profiler
+    with profiler.run('trend') as alone:
+        assert alone
+        with profiler.stage('figure'), profiler.stage('serialize'):
+            pass
+
+    page, fragment = [json.loads(line) for line in log.read_text().splitlines()]
+    assert 'fragment' not in page and page['data_hash'] == 'abc'
+    assert {r['section'] for r in page['records']} == {'trend', 'right column'}
+    assert fragment['fragment'] == 'trend' and fragment['data_hash'] == 'abc'
+    assert {(r['section'], r['stage']) for r in fragment['records']} == {('trend', 'figure'), ('trend', 'serialize')}
+    assert fragment['ts'] >= page['ts']
+
+
+def _unpack(packed):
+    # The browser's side of a base64 typed array
+    arr = np.frombuffer(base64.b64decode(packed['bdata']), dtype=np.dtype(packed['dtype']).newbyteorder('<'))
+    return arr.reshape([int(n) for n in packed['shape'].split(',')]) if 'shape' in packed else arr
+
+
+def test_compact_json_round_trips_typed_arrays():
+    # y survives a float32 round trip, z does not
+    y = np.linspace(0, 1, 40, dtype=np.float32).astype(float)
+    y[[3, 17]] = np.nan
+    z = np.linspace(0, 1, 60).reshape(6, 10)
+    z[2, 5] = np.nan
+    fig = go.Figure([
+        go.Scatter(x=np.arange(40), y=y, text=[f'p{i}' for i in range(40)], marker=dict(size=np.full(40, 300))),
+        go.Heatmap(z=z),
+        go.Bar(x=['a', 'b'], y=[1, 2]),
+    ])
+    plain = json.loads(fig.to_json())
+    spec = compact_json(fig)
+    # NaN travels inside the binary data, never as a bare JSON token
+    packed = json.loads(spec, parse_constant=pytest.fail)
+    assert spec == json.dumps(packed, separators=(',', ':'))
+    assert len(spec) < len(json.dumps(plain, separators=(',', ':')))
+
+    scatter, heatmap, bar = packed['data']
+    assert scatter['x']['dtype'] == 'i1'
+    assert scatter['y']['dtype'] == 'f4'
+    assert scatter['marker']['size']['dtype'] == 'i2'
+    assert heatmap['z']['dtype'] == 'f8' and heatmap['z']['shape'] == '6,10'
+    # Short and non-numeric arrays stay plain
+    assert scatter['text'] == plain['data'][0]['text'] and bar['y'] == [1, 2]
+
+    for array, original in [(scatter['x'], plain['data'][0]['x']), (scatter['y'], plain['data'][0]['y']),
+                            (heatmap['z'], plain['data'][1]['z'])]:
+        assert len(json.dumps(array)) < len(json.dumps(original, separators=(',', ':')))
+
+    assert np.array_equal(_unpack(scatter['x']), np.arange(40))
+    assert np.array_equal(_unpack(scatter['y']), y, equal_nan=True)
+    assert np.array_equal(_unpack(scatter['marker']['size']), np.full(40, 300))
+    assert np.array_equal(_unpack(heatmap['z']), z, equal_nan=True)
+    assert packed['layout'] == plain['layout']
+
+
+def test_sweep_does_not_rerun_the_page_script(tmp_path):
+    # A Streamlit page has no __main__ guard, so workers that re-import
+    # __main__ would run the whole page again
+    runs = tmp_path / 'runs.txt'
+    page = tmp_path / 'page.py'
+    page.write_text(textwrap.dedent(f"""
+        import sys
+        sys.path.insert(0, {CODE_DIR!r})
+        from dashboard_model import load_tables
+        from knn_sweep import sweep
+        with open({str(runs)!r}, 'a') as f:
+            f.write('page\\n')
+        sweep(load_tables({SHIPPED_DATA!r})[0], n_repeats=2, workers=2)
+    """))
+    subprocess.run([sys.executable, str(page)], check=True, timeout=300)
+    assert runs.read_text().splitlines() == ['page']
+
+
+@pytest.fixture
+def panel():
+    # Irregular survey years; B skips 2019 and C is only surveyed in 2024
+    rows = [('A', 2018, 50.0), ('A', 2019, 52.0), ('A', 2021, 55.0), ('A', 2024, 61.0),
+            ('B', 2018, 40.0), ('B', 2021, 46.0), ('B', 2024, 45.0),
+            ('C', 2024, 70.0)]
+    frame = pd.DataFrame(rows, columns=['Provinsi', 'Tahun', TGM_COL])
+    return TimeSeriesStore(frame, [TGM_COL], window=3)
+
+
+def test_yoy_compares_with_each_province_previous_survey(panel):
+    yoy = {year: panel.slice(year)[f'{TGM_COL} YoY'] for year in panel.years}
+    assert np.isnan(yoy[2018]['A']) and np.isnan(yoy[2018]['B'])
+    assert yoy[2019]['A'] == 2.0
+    assert yoy[2021]['A'] == 3.0
+    # Against 2018, not the missing 2019
+    assert yoy[2021]['B'] == 6.0
+    assert yoy[2024].to_dict() == pytest.approx({'A': 6.0, 'B': -1.0, 'C': np.nan}, nan_ok=True)
+
+
+def test_rolling_mean_spans_calendar_years(panel):
+    rolling = {year: panel.slice(year)[f'{TGM_COL} Rolling'] for year in panel.years}
+    assert rolling[2019]['A'] == pytest.approx(51.0)
+    # 2019-2021 for A; 2018 falls outside the three years up to 2021
+    assert rolling[2021]['A'] == pytest.approx(53.5)
+    assert rolling[2021]['B'] == pytest.approx(46.0)
+    # 2022-2024 holds only the 2024 survey
+    assert rolling[2024].to_dict() == pytest.approx({'A': 61.0, 'B': 45.0, 'C': 70.0})
+
+
+def test_national_trend_follows_the_selected_provinces(panel):
+    national = panel.national(TGM_COL, ['B'])
+    assert national['mean'].tolist() == pytest.approx([40.0, np.nan, 46.0, 45.0], nan_ok=True)
+    assert national['yoy'].tolist() == pytest.approx([np.nan, np.nan, 6.0, -1.0], nan_ok=True)
+    assert national['rolling'].tolist() == pytest.approx([40.0, 40.0, 46.0, 45.0])
+
+
+@pytest.fixture
+def sections():
+    return load_sections(SHIPPED_DATA)
+
+
+def test_schema_accepts_the_shipped_data(sections):
+    assert validate(sections) == ()
+
+
+def test_schema_names_a_renamed_column(sections):
+    sections['provinces'] = sections['provinces'].rename(columns={'Durasi Membaca1': 'Durasi Membaca 1'})
+    assert validate(sections) == ("provinces: missing column 'Durasi Membaca1' (found 'Durasi Membaca 1')",)
+
+
+@pytest.mark.parametrize('column, value, problem', [
+    ('APS_19_23', 120.0, "column 'APS_19_23' should be within [0, 100]"),
+    (LABEL_COL, 1.5, f"column '{LABEL_COL}' should be whole numbers"),
+    (TGM_COL, np.nan, f"column '{TGM_COL}' has 1 missing values"),
+])
+def test_schema_rejects_bad_values(sections, column, value, problem):
+    provinces = sections['provinces'].astype({column: float})
+    provinces.loc[3, column] = value
+    sections['provinces'] = provinces
+    problems = validate(sections)
+    assert any(p.startswith(f'provinces: {problem}') for p in problems), problems
+
+
+def test_schema_checks_statistics_against_provinces(sections):
+    sections['statistics'] = {**sections['statistics'], 'total_provinces': 40}
+    assert validate(sections) == ("statistics: 'total_provinces' is 40 but provinces give 38",)
+
+
+def test_schema_requires_only_provinces(sections):
+    provinces_only = {'provinces': sections['provinces']}
+    assert validate(provinces_only) == ()
+    del sections['provinces']
+    assert validate(sections) == ('provinces: section is missing',)
+
+
+def test_missing_meta_sections_reach_the_schema(tmp_path, sections):
+    path = tmp_path / 'data.json'
+    path.write_text(json.dumps({'provinces': sections['provinces'].to_dict(orient='records')}))
+    loaded = load_sections(str(path))
+    assert sorted(loaded) == ['provinces']
+    assert validate(loaded) == ()
+
+
+def test_columnar_round_trip_without_optional_sections(tmp_path, sections):
+    path = tmp_path / 'provinces_only.json'
+    with open(SHIPPED_DATA, encoding='utf-8') as f:
+        data = json.load(f)
+    path.write_text(json.dumps({key: data[key] for key in ('provinces', 'statistics')}))
+    write_columnar(str(path))
+    assert has_columnar(str(path))
+    assert not os.path.exists(columnar_path(str(path), 'pca_data'))
+
+    loaded = load_sections(str(path))
+    assert set(loaded) == {'provinces', 'statistics'}
+    assert loaded['provinces'].equals(sections['provinces'])
+    assert loaded['statistics'] == sections['statistics']
+    assert validate(loaded) == ()
+    # Read back from Arrow, not the JSON fallback
+    os.remove(path)
+    assert load_sections(str(path))['provinces'].equals(sections['provinces'])
@@ -0,0 +1,121 @@
+import warnings
+
+import numpy as np
+import pandas as pd
+
+YEAR_COL = 'Tahun'
+# Survey year of the provinces snapshot when its rows carry no Tahun column
+CURRENT_YEAR = 2024
+# Rolling means span this many calendar years, however many surveys fall in them
+ROLLING_WINDOW = 3
+
+
+def _rolling_nanmean(arr, years, window):
+    # Trailing mean over the survey years within `window` calendar years of each
+    # row (year - window, year], skipping missing values, from two cumulative
+    # sums instead of a Python loop over windows
+    valid = ~np.isnan(arr)
+    zeros = np.zeros((1, arr.shape[1]))
+    csum = np.vstack([zeros, np.cumsum(np.where(valid, arr, 0.0), axis=0)])
+    ccnt = np.vstack([zeros, np.cumsum(valid, axis=0)])
+    years = np.asarray(years)
+    idx = np.arange(1, len(arr) + 1)
+    lo = np.searchsorted(years, years - window, side='right')
+    counts = ccnt[idx] - ccnt[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, (csum[idx] - csum[lo]) / counts, np.nan)
+
+
+def _change_since_previous(arr):
+    # Each value minus the same column's latest earlier non-NaN value, so a
+    # province skipping a survey is compared with the one before the gap
+    rows = np.arange(len(arr))[:, None]
+    last = np.maximum.accumulate(np.where(np.isnan(arr), -1, rows), axis=0)
+    previous = np.vstack([np.full((1, arr.shape[1]), -1), last[:-1]])
+    earlier = np.take_along_axis(arr, np.maximum(previous, 0), axis=0)
+    return np.where(previous >= 0, arr - earlier, np.nan)
+
+
+class TimeSeriesStore:
+    # Province x year panel for the survey metrics. Each metric is a dense
+    # (year, province) array, so year-over-year deltas and rolling means are one
+    # vectorized op each, and every year's slice is materialized up front so
+    # switching years is a dict lookup.
+
+    def __init__(self, frame, metrics, window=ROLLING_WINDOW):
+        frame = frame.drop_duplicates([YEAR_COL, 'Provinsi'], keep='last')
+        self.window = window
+        self.metrics = tuple(metrics)
+        self.years = tuple(int(y) for y in np.sort(frame[YEAR_COL].unique()))
+        self.provinces = pd.Index(pd.unique(frame['Provinsi']), name='Provinsi')
+
+        year_idx = np.searchsorted(self.years, frame[YEAR_COL].to_numpy())
+        prov_idx = self.provinces.get_indexer(frame['Provinsi'])
+
+        self.values, self.yoy, self.rolling = {}, {}, {}
+        for metric in self.metrics:
+            arr = np.full((len(self.years), len(self.provinces)), np.nan)
+            arr[year_idx, prov_idx] = frame[metric].to_numpy(dtype=float)
+            self.values[metric] = arr
+            self.yoy[metric] = _change_since_previous(arr)
+            self.rolling[metric] = _rolling_nanmean(arr, self.years, window)
+
+        self._slices = {year: self._build_slice(i) for i, year in enumerate(self.years)}
+        self._national = {metric: self._build_national(metric) for metric in self.metrics}
+
+    def _build_slice(self, i):
+        columns = {}
+        for metric in self.metrics:
+            columns[metric] = self.values[metric][i]
+            columns[f'{metric} YoY'] = self.yoy[metric][i]
+            columns[f'{metric} Rolling'] = self.rolling[metric][i]
+        year_slice = pd.DataFrame(columns, index=self.provinces)
+        return year_slice[~np.isnan(self.values[self.metrics[0]][i])]
+
+    def _build_national(self, metric, columns=slice(None)):
+        arr = self.values[metric][:, columns]
+        # A subset of provinces may have no survey at all in some years; those
+        # years come out NaN
+        with np.errstate(invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            mean = np.nanmean(arr, axis=1)
+            low, high = np.nanmin(arr, axis=1), np.nanmax(arr, axis=1)
+        national = pd.DataFrame({
+            'mean': mean,
+            'min': low,
+            'max': high,
+            'rolling': _rolling_nanmean(mean[:, None], self.years, self.window)[:, 0],
+            'yoy': _change_since_previous(mean[:, None])[:, 0],
+        }, index=pd.Index(self.years, name=YEAR_COL))
+        return national
+
+    @property
+    def latest_year(self):
+        return self.years[-1]
+
+    def is_multi_year(self):
+        return len(self.years) > 1
+
+    # provinces limits either view to those names (the filtered selection);
+    # the full-panel results are precomputed, subsets are one column gather
+
+    def slice(self, year, provinces=None):
+        year_slice = self._slices[year]
+        return year_slice if provinces is None else year_slice[year_slice.index.isin(provinces)]
+
+    def national(self, metric, provinces=None):
+        if provinces is None:
+            return self._national[metric]
+        columns = self.provinces.get_indexer(pd.unique(np.asarray(provinces)))
+        return self._build_national(metric, columns[columns >= 0])
+
+
+def build_store(provinces, history=None, metrics=('Tingkat Kegemaran Membaca',)):
+    # The provinces snapshot is the current year; an optional history section
+    # adds earlier survey years with at least Provinsi, Tahun and the metrics
+    current = provinces[['Provinsi', *metrics]].copy()
+    current[YEAR_COL] = provinces[YEAR_COL] if YEAR_COL in provinces else CURRENT_YEAR
+    frames = [current]
+    if history is not None and len(history):
+        frames.insert(0, history[['Provinsi', YEAR_COL, *metrics]])
+    return TimeSeriesStore(pd.concat(frames, ignore_index=True), metrics)
@@ -0,0 +1,95 @@
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+from knn_engine import FEATURE_COLUMNS, LABEL_COL, LABEL_MAP, neighbor_index, standardize, vote_all_k
+
+N_NEAREST = 5
+# Cells per axis of a scenario grid
+GRID_SIZE = 50
+# Features on the scenario grid's axes until the user picks others
+GRID_AXES = ('Frekuensi Membaca', 'APS_19_23')
+
+
+@dataclass(frozen=True)
+class ScoreResult:
+    # One row per scored vector: the predicted Label_TGM and its nearest
+    # training rows (indices into the provinces table) with their distances in
+    # the standardized feature space, nearest first
+    labels: np.ndarray
+    neighbors: np.ndarray
+    distances: np.ndarray
+    names: np.ndarray
+
+    def frame(self):
+        out = pd.DataFrame({LABEL_COL: self.labels, 'Kategori': pd.Series(self.labels).map(LABEL_MAP)})
+        for i in range(self.neighbors.shape[1]):
+            out[f'Nearest {i + 1}'] = self.names[self.neighbors[:, i]]
+            out[f'Distance {i + 1}'] = self.distances[:, i]
+        return out
+
+
+class WhatIfScorer:
+    # The KNN classifier trained on the provinces table, for hypothetical
+    # feature vectors. Queries are standardized with the training mean and std
+    # and scored in chunked matrix blocks, so thousands of vectors (a scenario
+    # grid) are one call.
+
+    def __init__(self, df, k, columns=FEATURE_COLUMNS):
+        self.columns = tuple(columns)
+        self.k = k
+        self.X = X = df[list(columns)].to_numpy(dtype=float)
+        self.Z, self.mean, self.std = standardize(X)
+        self.y = df[LABEL_COL].to_numpy(dtype=int)
+        self.names = df['Provinsi'].to_numpy()
+        self.low = X.min(axis=0)
+        self.high = X.max(axis=0)
+        # Features a query leaves out take the national mean
+        self.defaults = X.mean(axis=0)
+
+    def matrix(self, vectors):
+        # DataFrame, list of dicts or (n, features) array -> float matrix in
+        # self.columns order
+        if isinstance(vectors, np.ndarray):
+            matrix = np.atleast_2d(vectors).astype(float)
+            if matrix.ndim != 2 or matrix.shape[1] != len(self.columns):
+                raise ValueError(f'expected vectors of {len(self.columns)} features {list(self.columns)}, '
+                                 f'got an array of shape {np.shape(vectors)}')
+        else:
+            frame = pd.DataFrame(vectors)
+            unknown = set(frame.columns) - set(self.columns)
+            if unknown:
+                raise ValueError(f'unknown features {sorted(unknown)}; expected some of {list(self.columns)}')
+            frame = frame.reindex(columns=list(self.columns))
+            matrix = frame.fillna(dict(zip(self.columns, self.defaults))).to_numpy(dtype=float)
+        # A NaN or inf would otherwise drop silently out of every distance ranking
+        bad = ~np.isfinite(matrix).all(axis=1)
+        if bad.any():
+            raise ValueError(f'{int(bad.sum())} vectors have missing or non-finite values, '
+                             f'e.g. row {int(np.flatnonzero(bad)[0])}')
+        return matrix
+
+    def score(self, vectors, n_nearest=N_NEAREST):
+        Q, _, _ = standardize(self.matrix(vectors), self.mean, self.std)
+        k = min(self.k, len(self.Z))
+        n_nearest = min(n_nearest, len(self.Z))
+        indices, distances = neighbor_index(Q, self.Z, max(k, n_nearest))
+        labels = vote_all_k(self.y[indices[:, :k]], [k])[0]
+        return ScoreResult(labels=labels, neighbors=indices[:, :n_nearest],
+                           distances=distances[:, :n_nearest], names=self.names)
+
+    def grid(self, point, x, y, size=GRID_SIZE):
+        # Predicted label over a size x size grid spanning the observed range of
+        # features x and y, every other feature held at point
+        ix, iy = self.columns.index(x), self.columns.index(y)
+        xs = np.linspace(self.low[ix], self.high[ix], size)
+        ys = np.linspace(self.low[iy], self.high[iy], size)
+        vectors = np.tile(np.asarray(point, dtype=float), (size * size, 1))
+        vectors[:, ix] = np.tile(xs, size)
+        vectors[:, iy] = np.repeat(ys, size)
+        return xs, ys, self.score(vectors, n_nearest=1).labels.reshape(size, size)
+
+
+def build_scorer(df, k, columns=FEATURE_COLUMNS):
+    return WhatIfScorer(df, k, columns)